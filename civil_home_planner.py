@@ -1,56 +1,79 @@
 import streamlit as st
 import requests
+from requests.adapters import HTTPAdapter
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+from urllib3.util.retry import Retry
+from urllib.parse import urlparse
 import json
-from typing import Optional, Dict, List
+import math
+import asyncio
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from copy import copy
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Callable, Final, Optional, Dict, Iterator, List
 from datetime import datetime
 import io
-import matplotlib.pyplot as plt
-import matplotlib.patches as patches
 import numpy as np
-from matplotlib.patches import Rectangle, FancyBboxPatch, Circle, Polygon
+# Figures are built on Figure + FigureCanvasAgg directly, so pyplot and its backend machinery are never loaded
+from matplotlib.patches import Rectangle, Circle
+from matplotlib.collections import EllipseCollection, PatchCollection, PolyCollection
+from matplotlib.figure import Figure
+from matplotlib.lines import Line2D
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.colors import to_rgba
+from matplotlib.path import Path
 import plotly.graph_objects as go
-import plotly.express as px
+from plotly.subplots import make_subplots
 
-class CivilHomePlanner:
-    """Ollama-powered civil home planning assistant"""
-    
-    def __init__(self, base_url: str = "http://localhost:11434"):
-        self.base_url = base_url
-        self.model = "llama3.2:latest"
-        
-    def check_connection(self) -> bool:
-        """Check if Ollama is accessible"""
-        try:
-            response = requests.get(f"{self.base_url}/api/tags", timeout=5)
-            return response.status_code == 200
-        except requests.exceptions.RequestException:
-            return False
-    
-    def get_available_models(self) -> List[str]:
-        """Get list of available models from Ollama"""
-        try:
-            response = requests.get(f"{self.base_url}/api/tags", timeout=5)
-            if response.status_code == 200:
-                models_data = response.json()
-                return [model['name'] for model in models_data.get('models', [])]
-            return []
-        except requests.exceptions.RequestException:
-            return []
-    
-    def get_design_suggestions(self, specifications: Dict) -> Optional[str]:
-        """Get home design suggestions based on specifications"""
-        try:
-            prompt = f"""You are an expert civil engineer and home designer. 
-            
-Based on these specifications, provide detailed design suggestions:
+try:
+    import faiss
+    from sentence_transformers import SentenceTransformer
+except ImportError:  # semantic matching is optional, exact matches still hit
+    faiss = None
+    SentenceTransformer = None
 
-Building Type: {specifications.get('building_type', 'Not specified')}
-Total Area: {specifications.get('total_area', 'Not specified')} sq ft
-Number of Floors: {specifications.get('num_floors', 'Not specified')}
-Number of Bedrooms: {specifications.get('bedrooms', 'Not specified')}
-Budget: {specifications.get('budget', 'Not specified')}
-Climate/Location: {specifications.get('climate', 'Not specified')}
-Special Requirements: {specifications.get('special_req', 'None')}
+try:
+    import aiohttp
+except ImportError:  # gather_all falls back to the pooled requests session on worker threads
+    aiohttp = None
+
+CACHE_DIR = os.path.expanduser("~/.civil_home_cache")
+CACHE_TTL = 86400
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+# Prompt fields typed freely by the user; only these may differ between semantically matched prompts
+FREE_TEXT_FIELDS = ("Special Requirements:", "Primary Materials:")
+DEFAULT_MODEL = "llama3.2:3b-instruct-q4_K_M"
+TOP_P = 0.9
+# Ollama reloads the model whenever num_ctx or num_thread change, so every call sends the same
+# values. 4k fits the combined report and still keeps the KV cache well below the 8k default.
+NUM_CTX = 4096
+NUM_PREDICT = 1024
+# Only sent to a local server; a remote host's core count is unknown here
+NUM_THREAD = max(1, (os.cpu_count() or 2) - 1)
+LOCAL_HOSTS = ("localhost", "127.0.0.1", "::1")
+# Floor plan PNG exports; schematics look the same at 150 dpi with a quarter of the pixels
+PNG_DPI = 150
+PNG_HIRES_DPI = 300
+# None drops the key matplotlib would otherwise stamp into every PNG
+PNG_METADATA: Final = MappingProxyType({'Software': None})
+# Drawings are keyed on the area rounded to this many sq ft; finer steps don't change the sketch
+AREA_STEP = 100
+# How long Ollama keeps the model resident after each request
+KEEP_ALIVE = "30m"
+
+# Static role instructions, sent as the Ollama system prompt. They must stay byte-identical
+# between calls so the server can reuse the KV cache of this prefix; only the short
+# per-request details go into the prompt.
+DESIGN_SYSTEM = """You are an expert civil engineer and home designer.
+
+Based on the specifications you are given, provide detailed design suggestions.
 
 Please provide:
 1. Room layout recommendations
@@ -58,48 +81,11 @@ Please provide:
 3. Material recommendations
 4. Cost estimation breakdown
 5. Timeline for construction
-6. Compliance with building codes
+6. Compliance with building codes"""
 
-Suggestions:"""
+MATERIALS_SYSTEM = """You are a construction materials expert.
 
-            payload = {
-                "model": self.model,
-                "prompt": prompt,
-                "stream": False,
-                "options": {
-                    "temperature": 0.4,
-                    "top_p": 0.9
-                }
-            }
-            
-            response = requests.post(
-                f"{self.base_url}/api/generate",
-                json=payload,
-                timeout=120
-            )
-            
-            if response.status_code == 200:
-                result = response.json()
-                return result.get('response', 'No suggestions generated.')
-            else:
-                st.error(f"Error from Ollama: {response.status_code}")
-                return None
-                
-        except requests.exceptions.Timeout:
-            st.error("Request timed out. Please try again.")
-            return None
-        except requests.exceptions.RequestException as e:
-            st.error(f"Error: {str(e)}")
-            return None
-    
-    def get_material_recommendations(self, climate: str, budget_range: str) -> Optional[str]:
-        """Get material recommendations based on climate and budget"""
-        try:
-            prompt = f"""You are a construction materials expert. 
-            
-Provide detailed material recommendations for a residential home project with these parameters:
-- Climate: {climate}
-- Budget Range: {budget_range}
+Provide detailed material recommendations for a residential home project with the parameters you are given.
 
 Please recommend:
 1. Foundation materials
@@ -111,47 +97,11 @@ Please recommend:
 7. Plumbing materials
 8. Electrical materials
 
-Include cost estimates and pros/cons for each category.
-
-Recommendations:"""
+Include cost estimates and pros/cons for each category."""
 
-            payload = {
-                "model": self.model,
-                "prompt": prompt,
-                "stream": False,
-                "options": {
-                    "temperature": 0.3,
-                    "top_p": 0.9
-                }
-            }
-            
-            response = requests.post(
-                f"{self.base_url}/api/generate",
-                json=payload,
-                timeout=120
-            )
-            
-            if response.status_code == 200:
-                result = response.json()
-                return result.get('response', 'No recommendations generated.')
-            return None
-            
-        except requests.exceptions.Timeout:
-            st.error("Request timed out.")
-            return None
-        except requests.exceptions.RequestException as e:
-            st.error(f"Error: {str(e)}")
-            return None
-    
-    def get_budget_estimation(self, area: float, quality: str, location: str) -> Optional[str]:
-        """Get detailed cost estimation"""
-        try:
-            prompt = f"""You are a construction cost estimator. 
+BUDGET_SYSTEM = """You are a construction cost estimator.
 
-Provide a detailed budget breakdown for a residential construction project:
-- Construction Area: {area} sq ft
-- Quality Level: {quality} (Basic/Standard/Premium)
-- Location Type: {location} (Urban/Suburban/Rural)
+Provide a detailed budget breakdown for the residential construction project you are given.
 
 Provide:
 1. Cost per square foot estimates
@@ -163,46 +113,16 @@ Provide:
 7. Cost-saving tips
 8. Premium options
 
-Format with clear categories and estimated ranges.
+Format with clear categories and estimated ranges."""
 
-Cost Estimation:"""
+BUDGET_JSON_SYSTEM = """You are a construction cost estimator. Reply with JSON only, using this schema:
+{"cost_per_sqft": str, "breakdown": [{"category": str, "cost": str}], "labor": str, "materials": str,
+ "contingency": str, "total": str, "tips": [str]}
+Costs are estimated ranges."""
 
-            payload = {
-                "model": self.model,
-                "prompt": prompt,
-                "stream": False,
-                "options": {
-                    "temperature": 0.3,
-                    "top_p": 0.9
-                }
-            }
-            
-            response = requests.post(
-                f"{self.base_url}/api/generate",
-                json=payload,
-                timeout=120
-            )
-            
-            if response.status_code == 200:
-                result = response.json()
-                return result.get('response', 'No estimation generated.')
-            return None
-            
-        except requests.exceptions.Timeout:
-            st.error("Request timed out.")
-            return None
-        except requests.exceptions.RequestException as e:
-            st.error(f"Error: {str(e)}")
-            return None
-    
-    def get_compliance_guide(self, construction_type: str, location: str) -> Optional[str]:
-        """Get building code and compliance guidelines"""
-        try:
-            prompt = f"""You are a building code compliance expert.
+COMPLIANCE_SYSTEM = """You are a building code compliance expert.
 
-Provide comprehensive building code compliance guidelines for:
-- Construction Type: {construction_type}
-- Location/Region: {location}
+Provide comprehensive building code compliance guidelines for the project you are given.
 
 Include:
 1. Fire safety requirements
@@ -216,45 +136,739 @@ Include:
 9. Ventilation requirements
 10. Permit and inspection checkpoints
 
-Provide specific standards and recommendations.
+Provide specific standards and recommendations."""
 
-Compliance Guide:"""
+VISUALIZATION_SYSTEM = """You are an expert in SketchUp modeling and 3D architectural visualization.
 
-            payload = {
-                "model": self.model,
-                "prompt": prompt,
-                "stream": False,
-                "options": {
-                    "temperature": 0.3,
-                    "top_p": 0.9
-                }
-            }
-            
-            response = requests.post(
+Provide a comprehensive guide for creating a 3D model in SketchUp with the specifications you are given.
+
+Include:
+1. SketchUp Setup & Best Practices
+2. Step-by-step modeling instructions for:
+   - Foundation and floor planning
+   - Wall construction
+   - Roof design
+   - Doors and windows placement
+3. Material and texture application
+4. Lighting setup for realistic rendering
+5. Camera angles for presentations
+6. Adding details (fixtures, furniture, landscaping)
+7. Rendering settings for high-quality output
+8. Export options for presentations
+9. Common mistakes to avoid
+10. Tips for realistic visualization
+
+Make it practical and actionable for someone using SketchUp."""
+
+
+REPORT_SECTIONS = ("design", "materials", "budget", "compliance")
+
+FULL_REPORT_SYSTEM = """You are an expert civil engineer, home designer, construction materials expert, cost estimator and building code compliance expert.
+
+For the home project you are given, write one combined report with exactly four sections, in this order.
+Start each section with its marker line exactly as shown and finish the report with ---END---.
+
+---SECTION:DESIGN---
+Room layout, structural design suggestions and timeline for construction.
+---SECTION:MATERIALS---
+Foundation, wall, roofing, flooring, window/door, interior, plumbing and electrical materials with cost estimates and pros/cons.
+---SECTION:BUDGET---
+Cost per square foot, detailed cost breakdown, labor and material costs, contingency (10-15%), total estimated budget and cost-saving tips.
+---SECTION:COMPLIANCE---
+Fire safety, structural, electrical, plumbing, HVAC, accessibility, insulation and ventilation requirements, and permit and inspection checkpoints.
+---END---"""
+
+
+def _split_report(text: str) -> Dict[str, Optional[str]]:
+    """Split a combined report on its ---SECTION:NAME--- markers"""
+    sections = dict.fromkeys(REPORT_SECTIONS)
+    body = text.split("---END---", 1)[0]
+    parts = re.split(r"^\s*---SECTION:\s*([A-Z]+)\s*---\s*$", body, flags=re.MULTILINE)
+    for name, content in zip(parts[1::2], parts[2::2]):
+        key = name.lower()
+        if key in sections and content.strip():
+            sections[key] = content.strip()
+    return sections
+
+
+def _report_complete(text: str) -> bool:
+    """Whether a combined report has every section; partial reports are not cached"""
+    return all(_split_report(text).values())
+
+
+def _is_json_object(text: str) -> bool:
+    """Whether text parses as a JSON object; truncated or non-JSON replies are not cached"""
+    try:
+        return isinstance(json.loads(text), dict)
+    except ValueError:
+        return False
+
+
+def _prefix_tokens(system: str) -> int:
+    """Rough token count of a system prompt (~4 characters per token) for num_keep"""
+    return len(system) // 4 + 16
+
+
+def _options(temperature: float, system: str, **overrides) -> Dict:
+    """Sampling options shared by every prompt, with the system prompt pinned via num_keep"""
+    return {
+        "temperature": temperature,
+        "top_p": TOP_P,
+        "num_keep": _prefix_tokens(system),
+        "num_predict": NUM_PREDICT,
+        **overrides
+    }
+
+
+def _runner_options(base_url: str) -> Dict:
+    """Options the loaded model runner is started with; identical on every call to one host"""
+    options = {"num_ctx": NUM_CTX}
+    if urlparse(base_url).hostname in LOCAL_HOSTS:
+        options["num_thread"] = NUM_THREAD
+    return options
+
+
+@dataclass(frozen=True, slots=True)
+class Palette:
+    """Colors used by the floor plan drawings"""
+    ink: str = '#2c3e50'
+    slate: str = '#34495e'
+    steel: str = '#7f8c8d'
+    concrete: str = '#95a5a6'
+    silver: str = '#bdc3c7'
+    cloud: str = '#ecf0f1'
+    porcelain: str = '#e8e8e8'
+    appliance: str = '#d3d3d3'
+    screen: str = '#1c1c1c'
+    wood_dark: str = '#8b4513'
+    wood_deep: str = '#654321'
+    wood_medium: str = '#d2691e'
+    wood_light: str = '#d4a574'
+    wood_gold: str = '#daa520'
+    wood_pale: str = '#dcc9a5'
+    wood_tan: str = '#cd853f'
+    linen: str = '#f5deb3'
+    cream: str = '#fff8dc'
+    glass_edge: str = '#3498db'
+    glass_fill: str = '#87ceeb'
+    water: str = '#b0e0e6'
+    steel_blue: str = '#b0c4de'
+    plan_background: str = '#fafafa'
+    room_background: str = '#fef5e7'
+    highlight: str = '#f9e79f'
+    hall_fill: str = '#ebf5fb'
+    hall_floor: str = '#f0e68c'
+    kitchen_edge: str = '#e74c3c'
+    kitchen_fill: str = '#fadbd8'
+    bedroom_edge: str = '#9b59b6'
+    bedroom_fill: str = '#f4ecf7'
+    bathroom_edge: str = '#16a085'
+    bathroom_fill: str = '#d5f4e6'
+    tub_fill: str = '#e8f8f5'
+
+
+DEFAULT_PALETTE: Final = Palette()
+
+# Per-style overrides; styles without an entry are drawn with DEFAULT_PALETTE
+# Read-only so the drawing code depends on nothing outside its arguments (the PNG caches key on those)
+STYLES: Final = MappingProxyType({})
+
+TITLE_BBOX: Final = MappingProxyType(dict(boxstyle='round', facecolor=DEFAULT_PALETTE.cloud,
+                                          edgecolor=DEFAULT_PALETTE.ink, linewidth=2))
+INFO_BBOX: Final = MappingProxyType(dict(boxstyle='round', facecolor=DEFAULT_PALETTE.highlight,
+                                         edgecolor=DEFAULT_PALETTE.ink, linewidth=1.5))
+BANNER_BBOX: Final = MappingProxyType(dict(boxstyle='round,pad=0.8', facecolor=DEFAULT_PALETTE.highlight,
+                                           edgecolor=DEFAULT_PALETTE.ink, linewidth=2))
+SUMMARY_BBOX: Final = MappingProxyType(dict(boxstyle='round', facecolor=DEFAULT_PALETTE.cloud,
+                                            edgecolor=DEFAULT_PALETTE.ink, linewidth=1.5))
+
+# Floor plan fixtures relative to their room anchor: chairs as x, y, w, h boxes around the dining
+# table, burner centres on the stove, and windows as (wall side, y) with side < 0 left, > 0 right
+_CHAIR_BOXES: Final = np.array([(16.5, 5.5, 1, 1), (13.5, 5.5, 1, 1), (15, 7.75, 1, 1), (15, 3.25, 1, 1)])
+_BURNER_OFFSETS: Final = np.array([(3.75, 2.75), (5.25, 2.75), (3.75, 4.25), (5.25, 4.25)])
+_WINDOW_OFFSETS: Final = np.array([(-0.2, 15), (-0.2, 35), (0.2, 15), (0.2, 35)])
+
+# Interior room views share fixed 0-100 axes; repeated fixtures as x, y, w, h boxes (knobs as centres)
+_HALL_CHAIRS: Final = np.array([(10, 15, 4, 4), (40, 15, 4, 4), (10, 35, 4, 4), (40, 35, 4, 4)])
+_HALL_WINDOWS: Final = np.array([(25, 75.5, 15, 2), (60, 75.5, 15, 2)])
+_STOVE_KNOBS: Final = np.array([(16, 27), (21, 27), (16, 32), (21, 32)])
+_KITCHEN_STOOLS: Final = np.array([(x, 20, 3, 3) for x in (58, 63, 68, 73, 78)])
+_KITCHEN_CABINETS: Final = np.array([(x, 40, 10, 15) for x in (10, 25, 40)])
+_BEDSIDE_TABLES: Final = np.array([(10, 45, 8, 10), (60, 45, 8, 10)])
+_BEDROOM_WINDOWS: Final = np.array([(25, 75.5, 18, 2), (60, 75.5, 18, 2)])
+_VANITY_SINKS: Final = np.array([(13, 18, 7, 7), (28, 18, 7, 7)])
+
+
+def _palette(style: str) -> Palette:
+    return STYLES.get(style, DEFAULT_PALETTE)
+
+
+def _blank_axes(ax, facecolor: str, xlim=(0, 100), ylim=(0, 100)):
+    """Fixed equal-aspect limits, no spines; unlike ax.axis('off') this keeps the background"""
+    ax.set_xlim(*xlim)
+    ax.set_ylim(*ylim)
+    ax.set_aspect('equal')
+    ax.set_facecolor(facecolor)
+    ax.set_autoscale_on(False)
+    ax.spines[:].set_visible(False)
+    return ax
+
+
+def _fill(edge: str, face: str, alpha: float) -> Dict[str, tuple]:
+    """Edge and face colours with alpha baked in, as a Patch alpha would blend them"""
+    return dict(edgecolor=to_rgba(edge, alpha), facecolor=to_rgba(face, alpha))
+
+
+def _box_patches(boxes) -> List[Rectangle]:
+    """Unstyled rectangles for an (N, 4) array of x, y, width, height boxes"""
+    boxes = np.asarray(boxes, dtype=float).reshape(-1, 4)
+    return [Rectangle((x, y), w, h) for x, y, w, h in boxes]
+
+
+def _box_collection(boxes, **props) -> PatchCollection:
+    """One PatchCollection for an (N, 4) array of x, y, width, height boxes"""
+    return PatchCollection(_box_patches(boxes), **props)
+
+
+def _rect(ax, base, dx: float, dy: float, w: float, h: float, **props) -> Rectangle:
+    """Add a w x h rectangle offset (dx, dy) from a room anchor"""
+    patch = Rectangle((base[0] + dx, base[1] + dy), w, h, **props)
+    ax.add_patch(patch)
+    return patch
+
+
+def _shape_table(*groups) -> tuple:
+    """Flatten (boxes, linewidth, alpha, edge, face) groups of x, y, w, h rows into per-shape arrays:
+    (N, 4, 2) corner vertices, line widths, alphas and edge/face colours as Palette field names"""
+    boxes = [np.asarray(group[0], dtype=float).reshape(-1, 4) for group in groups]
+    counts = [len(b) for b in boxes]
+    x, y, w, h = np.concatenate(boxes).T
+    verts = np.stack([np.c_[x, y], np.c_[x + w, y], np.c_[x + w, y + h], np.c_[x, y + h]], axis=1)
+    widths, alphas = (np.repeat([group[i] for group in groups], counts).astype(float) for i in (1, 2))
+    edges, faces = (tuple(np.repeat([group[i] for group in groups], counts).tolist()) for i in (3, 4))
+    return verts, widths, alphas, edges, faces
+
+
+def _shape_collection(table: tuple, p: Palette) -> PolyCollection:
+    """One PolyCollection for a _shape_table; colours not naming a Palette field are used as given"""
+    verts, widths, alphas, edges, faces = table
+    return PolyCollection(verts, linewidths=widths,
+                          edgecolors=[to_rgba(getattr(p, c, c), a) for c, a in zip(edges, alphas)],
+                          facecolors=[to_rgba(getattr(p, c, c), a) for c, a in zip(faces, alphas)])
+
+
+# Static furniture of the interior room views, in drawing order; walls, circles and labels are added per figure
+_HALL_SHAPES: Final = _shape_table(
+    ([(5, 5, 90, 70)], 3, 0.3, 'ink', 'hall_floor'),            # floor
+    ([(10, 50, 20, 12)], 2.5, 0.8, 'wood_dark', 'wood_light'),  # sofa
+    ([(35, 48, 15, 10)], 2, 0.7, 'wood_deep', 'wood_tan'),      # coffee table
+    ([(60, 45, 25, 15)], 2.5, 0.8, 'ink', 'slate'),             # TV unit
+    ([(63, 50, 18, 8)], 1, 0.9, 'black', 'screen'),             # TV screen
+    ([(15, 15, 25, 20)], 2.5, 0.7, 'wood_dark', 'wood_gold'),   # dining table
+    (_HALL_CHAIRS, 1.5, 1, 'wood_deep', 'wood_light'),
+    (_HALL_WINDOWS, 2, 0.8, 'glass_edge', 'glass_fill'),
+)
+_KITCHEN_SHAPES: Final = _shape_table(
+    ([(5, 5, 90, 70)], 3, 0.4, 'ink', 'cream'),                      # floor
+    ([(10, 10, 35, 8), (45, 10, 8, 30)], 2, 0.7, 'slate', 'concrete'),  # L-shaped countertop
+    ([(12, 20, 10, 10)], 2.5, 0.8, 'ink', 'steel'),                  # stove
+    ([(30, 18, 12, 14)], 2.5, 0.8, 'slate', 'steel_blue'),           # refrigerator
+    ([(12, 30, 12, 8)], 2, 0.8, 'ink', 'water'),                     # sink
+    ([(28, 32, 8, 8)], 2, 0.7, 'slate', 'appliance'),                # microwave
+    ([(55, 25, 25, 18)], 2.5, 0.6, 'wood_dark', 'wood_gold'),        # island / prep table
+    (_KITCHEN_STOOLS, 1.5, 1, 'wood_deep', 'wood_light'),
+    (_KITCHEN_CABINETS, 1.5, 0.7, 'wood_deep', 'wood_pale'),
+    ([(70, 75.5, 20, 2)], 2, 0.8, 'glass_edge', 'glass_fill'),       # window
+)
+_BEDROOM_SHAPES: Final = _shape_table(
+    ([(5, 5, 90, 70)], 3, 0.4, 'ink', 'bedroom_fill'),          # floor
+    ([(15, 35, 40, 30)], 2.5, 0.8, 'wood_dark', 'linen'),       # king bed
+    ([(15, 60, 40, 5)], 1, 0.9, 'wood_gold', 'cream'),          # headboard pillows
+    (_BEDSIDE_TABLES, 1.5, 0.7, 'wood_deep', 'wood_medium'),
+    ([(62, 25, 18, 35)], 2.5, 0.8, 'wood_deep', 'wood_medium'),  # wardrobe
+    ([(10, 10, 20, 12)], 2, 0.7, 'wood_dark', 'wood_gold'),     # study desk
+    ([(32, 10, 6, 8)], 1.5, 1, 'wood_deep', 'wood_light'),      # study chair
+    ([(45, 10, 15, 12)], 2, 0.7, 'wood_dark', 'wood_light'),    # lounge
+    (_BEDROOM_WINDOWS, 2, 0.8, 'glass_edge', 'glass_fill'),
+)
+_BATHROOM_SHAPES: Final = _shape_table(
+    ([(5, 5, 90, 70)], 3, 0.4, 'ink', 'bathroom_fill'),         # floor
+    ([(10, 40, 30, 20)], 2.5, 0.9, 'ink', 'tub_fill'),          # bathtub
+    ([(50, 35, 20, 25)], 2, 0.6, 'ink', 'water'),               # shower
+    ([(10, 15, 35, 12)], 2, 0.7, 'slate', 'concrete'),          # vanity
+    (_VANITY_SINKS, 1.5, 0.8, 'ink', 'water'),
+    ([(48, 18, 25, 12)], 2, 0.7, 'steel', 'porcelain'),         # mirror
+    ([(75, 15, 15, 12)], 1.5, 0.6, 'wood_deep', 'wood_medium'),  # storage cabinet
+    ([(40, 75.5, 20, 2)], 2, 0.8, 'glass_edge', 'glass_fill'),  # window / exhaust vent
+)
+
+# Outer walls are the same in every room view; each axes adds a copy of this one styled line
+_WALL_XY: Final = np.array([[5, 5, 95, 95, 5], [5, 75, 75, 5, 5]])
+_WALL_LINE: Final = Line2D(*_WALL_XY, color='k', linestyle='-', linewidth=4)
+
+
+class SemanticCache:
+    """On-disk cache of LLM responses with exact and semantic prompt matching"""
+    
+    def __init__(self, cache_dir: str = CACHE_DIR, threshold: float = 0.92, ttl: float = CACHE_TTL):
+        self.cache_dir = cache_dir
+        self.threshold = threshold
+        self.ttl = ttl
+        os.makedirs(cache_dir, exist_ok=True)
+        
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(os.path.join(cache_dir, "responses.sqlite3"), check_same_thread=False)
+        self._db.execute("""CREATE TABLE IF NOT EXISTS responses (
+            id INTEGER PRIMARY KEY,
+            namespace TEXT NOT NULL,
+            key TEXT NOT NULL,
+            prompt TEXT NOT NULL,
+            model TEXT NOT NULL,
+            temperature REAL NOT NULL,
+            response TEXT NOT NULL,
+            created REAL NOT NULL
+        )""")
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_key ON responses (key)")
+        self._db.execute("DELETE FROM responses WHERE created < ?", (time.time() - ttl,))
+        self._db.commit()
+        
+        self._encoder = None
+        self._indexes = {}
+    
+    @staticmethod
+    def _key(payload: Dict) -> str:
+        """SHA-256 of the canonical JSON of everything that determines the completion"""
+        canonical = {"model": payload["model"], "system": payload.get("system", ""), "prompt": payload["prompt"],
+                     **payload.get("options", {})}
+        if "format" in payload:
+            canonical["format"] = payload["format"]
+        raw = json.dumps(canonical, sort_keys=True)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+    
+    @staticmethod
+    def _numbers(prompt: str) -> List[str]:
+        """Numbers in a prompt; specs that differ here are never treated as equivalent"""
+        return re.findall(r"\d+(?:\.\d+)?", prompt)
+    
+    @staticmethod
+    def _fixed_fields(prompt: str) -> List[str]:
+        """Prompt lines other than free-text fields; climate, quality, style etc. must match word for word"""
+        return [line for line in prompt.splitlines() if not line.lstrip("- ").startswith(FREE_TEXT_FIELDS)]
+    
+    @staticmethod
+    def _free_text(prompt: str) -> str:
+        """Values of the free-text fields, the only part of a prompt that is matched by embedding"""
+        values = [line.lstrip("- ").split(":", 1)[1].strip() for line in prompt.splitlines()
+                  if line.lstrip("- ").startswith(FREE_TEXT_FIELDS)]
+        return "\n".join(value for value in values if value)
+    
+    def _embed(self, prompt: str):
+        if SentenceTransformer is None:
+            return None
+        if self._encoder is None:
+            with self._lock:
+                if self._encoder is None:
+                    self._encoder = SentenceTransformer(EMBEDDING_MODEL)
+        vector = self._encoder.encode([prompt], normalize_embeddings=True)
+        return np.asarray(vector, dtype=np.float32)
+    
+    def _index_path(self, namespace: str) -> str:
+        return os.path.join(self.cache_dir, f"{namespace}.free_text.faiss")
+    
+    def _index(self, namespace: str, dim: int):
+        """Free-text embeddings of a namespace; vectors of rows the TTL purge deleted are dropped on load"""
+        if namespace not in self._indexes:
+            path = self._index_path(namespace)
+            if os.path.exists(path):
+                index = faiss.read_index(path)
+                live = {row_id for row_id, in self._db.execute(
+                    "SELECT id FROM responses WHERE namespace = ?", (namespace,))}
+                stale = [row_id for row_id in faiss.vector_to_array(index.id_map).tolist() if row_id not in live]
+                if stale:
+                    index.remove_ids(np.array(stale, dtype=np.int64))
+                self._indexes[namespace] = index
+            else:
+                self._indexes[namespace] = faiss.IndexIDMap(faiss.IndexFlatIP(dim))
+        return self._indexes[namespace]
+    
+    def get(self, namespace: str, payload: Dict) -> Optional[str]:
+        """Return a cached response for this payload, or for the same spec with equivalent free text"""
+        prompt = payload["prompt"]
+        fresh_after = time.time() - self.ttl
+        with self._lock:
+            row = self._db.execute(
+                "SELECT response FROM responses WHERE key = ? AND created >= ? LIMIT 1",
+                (self._key(payload), fresh_after)
+            ).fetchone()
+        if row is not None:
+            return row[0]
+    
+        # Only the free text is compared by embedding, and only against fresh rows whose
+        # numbers and fixed fields match this prompt exactly
+        free_text = self._free_text(prompt)
+        if not free_text:
+            return None
+        vector = self._embed(free_text)
+        if vector is None:
+            return None
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT id, prompt, response FROM responses "
+                "WHERE namespace = ? AND model = ? AND temperature = ? AND created >= ?",
+                (namespace, payload["model"], payload["options"].get("temperature"), fresh_after)
+            ).fetchall()
+            candidates = {row_id: response for row_id, cached_prompt, response in rows
+                          if self._numbers(cached_prompt) == self._numbers(prompt)
+                          and self._fixed_fields(cached_prompt) == self._fixed_fields(prompt)}
+            if not candidates:
+                return None
+            index = self._index(namespace, vector.shape[1])
+            if index.ntotal == 0:
+                return None
+            selector = faiss.IDSelectorBatch(np.array(list(candidates), dtype=np.int64))
+            scores, ids = index.search(vector, 1, params=faiss.SearchParameters(sel=selector))
+        if ids[0][0] < 0 or scores[0][0] < self.threshold:
+            return None
+        return candidates[int(ids[0][0])]
+    
+    def put(self, namespace: str, payload: Dict, response: str):
+        """Store a fresh response under its exact key and the embedding of its free text"""
+        free_text = self._free_text(payload["prompt"])
+        vector = self._embed(free_text) if free_text else None
+        with self._lock:
+            cursor = self._db.execute(
+                "INSERT INTO responses (namespace, key, prompt, model, temperature, response, created) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (namespace, self._key(payload), payload["prompt"], payload["model"],
+                 payload["options"].get("temperature"), response, time.time())
+            )
+            self._db.commit()
+            if vector is not None:
+                index = self._index(namespace, vector.shape[1])
+                index.add_with_ids(vector, np.array([cursor.lastrowid], dtype=np.int64))
+                faiss.write_index(index, self._index_path(namespace))
+
+
+class CivilHomePlanner:
+    """Ollama-powered civil home planning assistant"""
+    
+    def __init__(self, base_url: str = "http://localhost:11434", cache: Optional[SemanticCache] = None):
+        self.base_url = base_url
+        self.model = DEFAULT_MODEL
+        self._runner = _runner_options(base_url)
+        
+        # Reuse one keep-alive connection pool for every Ollama call; retry failed connects
+        # (e.g. while Ollama restarts) but never resend a generation that reached the server
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=8, pool_maxsize=16,
+                              max_retries=Retry(total=2, connect=2, read=0, status=0, backoff_factor=0.1))
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+        
+        # Planners share get_response_cache(): separate instances would overwrite each other's index files
+        self._cache = cache if cache is not None else SemanticCache()
+        self._warmed = set()
+        self._warm_lock = threading.Lock()
+        
+        # Persistent interior design figure; only its title and summary change between plans
+        self._fig = None
+        self._fig_palette = None
+        self._suptitle = None
+        self._info_text = None
+        self._fig_lock = threading.Lock()
+    
+    def close(self):
+        """Release pooled HTTP connections"""
+        self._session.close()
+    
+    def __del__(self):
+        session = getattr(self, "_session", None)
+        if session is not None:
+            session.close()
+        
+    def check_connection(self, warm: bool = True) -> bool:
+        """Check if Ollama is accessible, and start loading the model when it is"""
+        try:
+            response = self._session.get(f"{self.base_url}/api/tags", timeout=5)
+        except requests.exceptions.RequestException:
+            return False
+        if response.status_code != 200:
+            return False
+        if warm:
+            self.warm_up()
+        return True
+    
+    def warm_up(self):
+        """Load the current model into memory in the background, once per model"""
+        with self._warm_lock:
+            if self.model in self._warmed:
+                return
+            self._warmed.add(self.model)
+        threading.Thread(target=self._warm, args=(self.model,), daemon=True).start()
+    
+    def _warm(self, model: str):
+        """Empty prompt: Ollama loads the model with the runner options real calls send, and returns"""
+        try:
+            self._session.post(
+                f"{self.base_url}/api/generate",
+                json={"model": model, "prompt": "", "stream": False,
+                      "keep_alive": KEEP_ALIVE, "options": {**self._runner, "num_predict": 1}},
+                timeout=30
+            )
+        except requests.exceptions.RequestException:
+            pass
+    
+    def get_available_models(self) -> List[str]:
+        """Get list of available models from Ollama"""
+        try:
+            response = self._session.get(f"{self.base_url}/api/tags", timeout=5)
+            if response.status_code == 200:
+                models_data = response.json()
+                return [model['name'] for model in models_data.get('models', [])]
+            return []
+        except requests.exceptions.RequestException:
+            return []
+    
+    def _generate(self, namespace: str, system: str, prompt: str, options: Dict,
+                  empty_message: str, response_format: Optional[str] = None,
+                  validate: Optional[Callable[[str], bool]] = None) -> Optional[str]:
+        """Send a prompt to Ollama, serving repeated payloads from the response cache
+        
+        Responses that fail validate are returned but never cached, so the next call asks again.
+        """
+        payload = {
+            "model": self.model,
+            "system": system,
+            "prompt": prompt,
+            "options": {**options, **self._runner}
+        }
+        if response_format:
+            payload["format"] = response_format
+        cached = self._cache.get(namespace, payload)
+        if cached is not None and (validate is None or validate(cached)):
+            return cached
+        
+        try:
+            response = self._session.post(
                 f"{self.base_url}/api/generate",
-                json=payload,
+                json={**payload, "stream": False, "keep_alive": KEEP_ALIVE},
                 timeout=120
             )
             
             if response.status_code == 200:
                 result = response.json()
-                return result.get('response', 'No guide generated.')
+                text = result.get('response')
+                if not text:
+                    return empty_message
+                if validate is None or validate(text):
+                    self._cache.put(namespace, payload, text)
+                return text
+            else:
+                st.error(f"Error from Ollama: {response.status_code}")
+                return None
+                
+        except requests.exceptions.Timeout:
+            st.error("Request timed out. Please try again.")
             return None
+        except requests.exceptions.RequestException as e:
+            st.error(f"Error: {str(e)}")
+            return None
+    
+    def _stream_generate(self, namespace: str, system: str, prompt: str, options: Dict,
+                         empty_message: str, validate: Optional[Callable[[str], bool]] = None) -> Iterator[str]:
+        """Yield response chunks from Ollama as they arrive, caching the full text at the end
+        
+        As in _generate, a full text that fails validate is not cached.
+        """
+        payload = {
+            "model": self.model,
+            "system": system,
+            "prompt": prompt,
+            "options": {**options, **self._runner}
+        }
+        cached = self._cache.get(namespace, payload)
+        if cached is not None and (validate is None or validate(cached)):
+            yield cached
+            return
+        
+        try:
+            with self._session.post(
+                f"{self.base_url}/api/generate",
+                json={**payload, "stream": True, "keep_alive": KEEP_ALIVE},
+                timeout=120,
+                stream=True
+            ) as response:
+                if response.status_code != 200:
+                    st.error(f"Error from Ollama: {response.status_code}")
+                    return
+                
+                parts = []
+                for line in response.iter_lines():
+                    if not line:
+                        continue
+                    chunk = json.loads(line)
+                    text = chunk.get('response', '')
+                    if text:
+                        parts.append(text)
+                        yield text
+                    if chunk.get('done'):
+                        break
             
+            if not parts:
+                yield empty_message
+            elif validate is None or validate(''.join(parts)):
+                self._cache.put(namespace, payload, ''.join(parts))
+                
         except requests.exceptions.Timeout:
-            st.error("Request timed out.")
-            return None
+            st.error("Request timed out. Please try again.")
         except requests.exceptions.RequestException as e:
             st.error(f"Error: {str(e)}")
+    
+    async def _agenerate(self, http, namespace: str, system: str, prompt: str, options: Dict,
+                         empty_message: str) -> Optional[str]:
+        """Async counterpart of _generate over a shared aiohttp session"""
+        payload = {
+            "model": self.model,
+            "system": system,
+            "prompt": prompt,
+            "options": {**options, **self._runner}
+        }
+        cached = await asyncio.to_thread(self._cache.get, namespace, payload)
+        if cached is not None:
+            return cached
+        
+        try:
+            async with http.post(
+                f"{self.base_url}/api/generate",
+                json={**payload, "stream": False, "keep_alive": KEEP_ALIVE}
+            ) as response:
+                if response.status != 200:
+                    st.error(f"Error from Ollama: {response.status}")
+                    return None
+                result = json.loads(await response.read())
+            
+            text = result.get('response')
+            if not text:
+                return empty_message
+            await asyncio.to_thread(self._cache.put, namespace, payload, text)
+            return text
+        
+        except asyncio.TimeoutError:
+            st.error("Request timed out. Please try again.")
+            return None
+        except aiohttp.ClientError as e:
+            st.error(f"Error: {str(e)}")
+            return None
+    
+    def _design_request(self, specifications: Dict) -> tuple:
+        """Build the Ollama request for design suggestions"""
+        prompt = f"""Building Type: {specifications.get('building_type', 'Not specified')}
+Total Area: {specifications.get('total_area', 'Not specified')} sq ft
+Number of Floors: {specifications.get('num_floors', 'Not specified')}
+Number of Bedrooms: {specifications.get('bedrooms', 'Not specified')}
+Budget: {specifications.get('budget', 'Not specified')}
+Climate/Location: {specifications.get('climate', 'Not specified')}
+Special Requirements: {specifications.get('special_req', 'None')}
+
+Suggestions:"""
+        
+        return ("design", DESIGN_SYSTEM, prompt, _options(0.4, DESIGN_SYSTEM), 'No suggestions generated.')
+    
+    def get_design_suggestions(self, specifications: Dict) -> Optional[str]:
+        """Get home design suggestions based on specifications"""
+        return self._generate(*self._design_request(specifications))
+    
+    def stream_design_suggestions(self, specifications: Dict) -> Iterator[str]:
+        """Stream design suggestions as they are generated"""
+        return self._stream_generate(*self._design_request(specifications))
+    
+    def _materials_request(self, climate: str, budget_range: str) -> tuple:
+        """Build the Ollama request for material recommendations"""
+        prompt = f"""- Climate: {climate}
+- Budget Range: {budget_range}
+
+Recommendations:"""
+        
+        return ("materials", MATERIALS_SYSTEM, prompt, _options(0.3, MATERIALS_SYSTEM), 'No recommendations generated.')
+    
+    def get_material_recommendations(self, climate: str, budget_range: str) -> Optional[str]:
+        """Get material recommendations based on climate and budget"""
+        return self._generate(*self._materials_request(climate, budget_range))
+    
+    def stream_material_recommendations(self, climate: str, budget_range: str) -> Iterator[str]:
+        """Stream material recommendations as they are generated"""
+        return self._stream_generate(*self._materials_request(climate, budget_range))
+    
+    def _budget_request(self, area: float, quality: str, location: str) -> tuple:
+        """Build the Ollama request for the cost estimation"""
+        prompt = f"""- Construction Area: {area} sq ft
+- Quality Level: {quality} (Basic/Standard/Premium)
+- Location Type: {location} (Urban/Suburban/Rural)
+
+Cost Estimation:"""
+        
+        return ("budget", BUDGET_SYSTEM, prompt, _options(0.3, BUDGET_SYSTEM), 'No estimation generated.')
+    
+    def get_budget_estimation(self, area: float, quality: str, location: str) -> Optional[str]:
+        """Get detailed cost estimation"""
+        return self._generate(*self._budget_request(area, quality, location))
+    
+    def stream_budget_estimation(self, area: float, quality: str, location: str) -> Iterator[str]:
+        """Stream the cost estimation as it is generated"""
+        return self._stream_generate(*self._budget_request(area, quality, location))
+    
+    def get_budget_breakdown(self, area: float, quality: str, location: str) -> Optional[Dict]:
+        """Get the cost estimation as structured JSON for tabular display"""
+        prompt = f"Estimate the budget for {area} sq ft, {quality} quality, {location} location."
+        text = self._generate("budget_json", BUDGET_JSON_SYSTEM, prompt,
+                              _options(0.3, BUDGET_JSON_SYSTEM, num_predict=1200), '',
+                              response_format="json", validate=_is_json_object)
+        if not text:
+            return None
+        try:
+            breakdown = json.loads(text)
+        except ValueError:
+            st.error("Ollama returned a budget that is not valid JSON.")
+            return None
+        if not isinstance(breakdown, dict):
             return None
+        
+        # The model doesn't always follow the schema; coerce the list fields so the table can trust them
+        items = breakdown.get('breakdown')
+        if isinstance(items, dict):
+            items = [{"category": name, "cost": cost} for name, cost in items.items()]
+        breakdown['breakdown'] = [item for item in items if isinstance(item, dict)] if isinstance(items, list) else []
+        tips = breakdown.get('tips')
+        if isinstance(tips, list):
+            breakdown['tips'] = [str(tip) for tip in tips if tip]
+        else:
+            breakdown['tips'] = [str(tips)] if tips else []
+        return breakdown
+    
+    def _compliance_request(self, construction_type: str, location: str) -> tuple:
+        """Build the Ollama request for compliance guidelines"""
+        prompt = f"""- Construction Type: {construction_type}
+- Location/Region: {location}
+
+Compliance Guide:"""
+        
+        return ("compliance", COMPLIANCE_SYSTEM, prompt, _options(0.3, COMPLIANCE_SYSTEM), 'No guide generated.')
+    
+    def get_compliance_guide(self, construction_type: str, location: str) -> Optional[str]:
+        """Get building code and compliance guidelines"""
+        return self._generate(*self._compliance_request(construction_type, location))
+    
+    def stream_compliance_guide(self, construction_type: str, location: str) -> Iterator[str]:
+        """Stream compliance guidelines as they are generated"""
+        return self._stream_generate(*self._compliance_request(construction_type, location))
     
     def draw_detailed_floor_plan(self, bedrooms: int, bathrooms: int, area: float, style: str):
         """Draw detailed complete interior floor plan with furniture and fixtures"""
-        fig, ax = plt.subplots(1, 1, figsize=(18, 14))
-        ax.set_xlim(0, 140)
-        ax.set_ylim(0, 120)
-        ax.set_aspect('equal')
-        ax.set_facecolor('#fafafa')
+        p = _palette(style)
+        fig = Figure(figsize=(18, 14))
+        FigureCanvasAgg(fig)
+        fig.subplots_adjust(left=0.02, right=0.98, top=0.98, bottom=0.02)
+        ax = _blank_axes(fig.add_subplot(111, xticks=[], yticks=[]), p.plan_background, xlim=(0, 140), ylim=(0, 120))
         
         # Calculate dimensions based on area
         width = np.sqrt(area / 100) * 12
@@ -270,7 +884,7 @@ Compliance Guide:"""
         
         # ============ OUTER WALLS ============
         outer_wall = Rectangle((start_x, start_y), width, height, 
-                              linewidth=4, edgecolor='#2c3e50', facecolor='#ecf0f1', alpha=0.3)
+                              linewidth=4, **_fill(p.ink, p.cloud, 0.3))
         ax.add_patch(outer_wall)
         
         # ============ ROOMS DIMENSIONS ============
@@ -278,212 +892,169 @@ Compliance Guide:"""
         hall_width = width / 2
         kitchen_width = width / 4
         
+        # Room origins, computed once; furniture is placed as offsets from these
+        top_y = start_y + height - main_height
+        anchors = {
+            'living': (start_x, top_y),
+            'kitchen': (start_x + hall_width, top_y),
+            'door': (start_x + hall_width, start_y),
+        }
+        lx, ly = anchors['living']
+        kx, ky = anchors['kitchen']
+        
         # ============ LIVING ROOM / HALL ============
-        living_rect = Rectangle((start_x + 1, start_y + height - main_height - 1), 
-                               hall_width - 2, main_height - 2,
-                               linewidth=2.5, edgecolor='#3498db', facecolor='#ebf5fb', alpha=0.6)
-        ax.add_patch(living_rect)
+        _rect(ax, anchors['living'], 1, -1, hall_width - 2, main_height - 2,
+              linewidth=2.5, **_fill(p.glass_edge, p.hall_fill, 0.6))
         
         # Living room furniture
         # Sofa
-        sofa = Rectangle((start_x + 3, start_y + height - main_height + 2), 8, 3, 
-                        linewidth=2, edgecolor='#8b4513', facecolor='#d4a574')
-        ax.add_patch(sofa)
-        ax.text(start_x + 7, start_y + height - main_height + 3.5, 'SOFA', 
-               ha='center', va='center', fontsize=8, weight='bold')
+        _rect(ax, anchors['living'], 3, 2, 8, 3, linewidth=2, edgecolor=p.wood_dark, facecolor=p.wood_light)
+        ax.text(lx + 7, ly + 3.5, 'SOFA', ha='center', va='center', fontsize=8, weight='bold')
         
         # Coffee table
-        coffee = Rectangle((start_x + 3, start_y + height - main_height + 6), 8, 2, 
-                          linewidth=1.5, edgecolor='#654321', facecolor='#d2691e', alpha=0.7)
-        ax.add_patch(coffee)
-        ax.text(start_x + 7, start_y + height - main_height + 7, 'TABLE', 
-               ha='center', va='center', fontsize=7, weight='bold', color='white')
+        _rect(ax, anchors['living'], 3, 6, 8, 2,
+              linewidth=1.5, **_fill(p.wood_deep, p.wood_medium, 0.7))
+        ax.text(lx + 7, ly + 7, 'TABLE', ha='center', va='center', fontsize=7, weight='bold', color='white')
         
         # TV Unit
-        tv = Rectangle((start_x + 3, start_y + height - main_height + 9), 8, 2.5, 
-                       linewidth=2, edgecolor='#2c3e50', facecolor='#34495e')
-        ax.add_patch(tv)
-        ax.text(start_x + 7, start_y + height - main_height + 10.2, 'TV UNIT', 
-               ha='center', va='center', fontsize=7, weight='bold', color='white')
+        _rect(ax, anchors['living'], 3, 9, 8, 2.5, linewidth=2, edgecolor=p.ink, facecolor=p.slate)
+        ax.text(lx + 7, ly + 10.2, 'TV UNIT', ha='center', va='center', fontsize=7, weight='bold', color='white')
         
         # Dining table
-        dining = Rectangle((start_x + 12, start_y + height - main_height + 3), 6, 5, 
-                          linewidth=2, edgecolor='#8b4513', facecolor='#daa520', alpha=0.7)
-        ax.add_patch(dining)
-        ax.text(start_x + 15, start_y + height - main_height + 5.5, 'DINING', 
-               ha='center', va='center', fontsize=8, weight='bold')
+        _rect(ax, anchors['living'], 12, 3, 6, 5,
+              linewidth=2, **_fill(p.wood_dark, p.wood_gold, 0.7))
+        ax.text(lx + 15, ly + 5.5, 'DINING', ha='center', va='center', fontsize=8, weight='bold')
         
         # Chairs around dining
-        for i, (x_off, y_off) in enumerate([(1, 0), (-1, 0), (0, 1.5), (0, -1.5)]):
-            chair = Rectangle((start_x + 15 + x_off*1.5, start_y + height - main_height + 5.5 + y_off*1.5), 
-                            1, 1, linewidth=1, edgecolor='brown', facecolor='#d4a574')
-            ax.add_patch(chair)
+        ax.add_collection(_box_collection(_CHAIR_BOXES + (lx, ly, 0, 0), linewidths=1, edgecolors='brown', facecolors=p.wood_light))
         
-        ax.text(start_x + hall_width/2, start_y + height - 2, 'LIVING ROOM / HALL', 
-               ha='center', fontsize=11, weight='bold', style='italic', color='#2c3e50')
+        ax.text(lx + hall_width/2, start_y + height - 2, 'LIVING ROOM / HALL', 
+               ha='center', fontsize=11, weight='bold', style='italic', color=p.ink)
         
         # ============ KITCHEN ============
-        kitchen_rect = Rectangle((start_x + hall_width + 1, start_y + height - main_height - 1), 
-                                width - hall_width - 2, main_height - 2,
-                                linewidth=2.5, edgecolor='#e74c3c', facecolor='#fadbd8', alpha=0.6)
-        ax.add_patch(kitchen_rect)
+        _rect(ax, anchors['kitchen'], 1, -1, width - hall_width - 2, main_height - 2,
+              linewidth=2.5, **_fill(p.kitchen_edge, p.kitchen_fill, 0.6))
         
         # Stove/Cooktop
-        stove = Rectangle((start_x + hall_width + 3, start_y + height - main_height + 2), 3, 3, 
-                         linewidth=2, edgecolor='#34495e', facecolor='#95a5a6')
-        ax.add_patch(stove)
+        _rect(ax, anchors['kitchen'], 3, 2, 3, 3, linewidth=2, edgecolor=p.slate, facecolor=p.concrete)
         # Burners
-        for i in range(4):
-            circle = Circle((start_x + hall_width + 3.75 + (i % 2)*1.5, start_y + height - main_height + 2.75 + (i // 2)*1.5), 
-                          0.4, color='#7f8c8d', ec='black', linewidth=1)
-            ax.add_patch(circle)
-        ax.text(start_x + hall_width + 4.5, start_y + height - main_height + 5.5, 'STOVE', 
-               ha='center', fontsize=7, weight='bold', color='white')
+        ax.add_collection(EllipseCollection(
+            np.full(4, 0.8), np.full(4, 0.8), np.zeros(4), units='xy',
+            offsets=_BURNER_OFFSETS + (kx, ky), offset_transform=ax.transData,
+            facecolors=p.steel, edgecolors='black', linewidths=1))
+        ax.text(kx + 4.5, ky + 5.5, 'STOVE', ha='center', fontsize=7, weight='bold', color='white')
         
         # Refrigerator
-        fridge = Rectangle((start_x + hall_width + 7, start_y + height - main_height + 2), 3, 3, 
-                          linewidth=2, edgecolor='#2c3e50', facecolor='#bdc3c7')
-        ax.add_patch(fridge)
-        ax.text(start_x + hall_width + 8.5, start_y + height - main_height + 3.5, 'FRIDGE', 
-               ha='center', fontsize=7, weight='bold')
+        _rect(ax, anchors['kitchen'], 7, 2, 3, 3, linewidth=2, edgecolor=p.ink, facecolor=p.silver)
+        ax.text(kx + 8.5, ky + 3.5, 'FRIDGE', ha='center', fontsize=7, weight='bold')
         
         # Counter/Sink
-        counter = Rectangle((start_x + hall_width + 11, start_y + height - main_height + 2), 4, 3, 
-                           linewidth=2, edgecolor='#34495e', facecolor='#b0c4de')
-        ax.add_patch(counter)
+        _rect(ax, anchors['kitchen'], 11, 2, 4, 3, linewidth=2, edgecolor=p.slate, facecolor=p.steel_blue)
         # Sink
-        sink = Rectangle((start_x + hall_width + 12, start_y + height - main_height + 2.5), 2, 1.5, 
-                        linewidth=1, edgecolor='#2c3e50', facecolor='#e8e8e8')
-        ax.add_patch(sink)
-        ax.text(start_x + hall_width + 13, start_y + height - main_height + 3.2, 'SINK', 
-               ha='center', fontsize=6, weight='bold')
+        _rect(ax, anchors['kitchen'], 12, 2.5, 2, 1.5, linewidth=1, edgecolor=p.ink, facecolor=p.porcelain)
+        ax.text(kx + 13, ky + 3.2, 'SINK', ha='center', fontsize=6, weight='bold')
         
         # Storage cabinets
-        for j in range(2):
-            cabinet = Rectangle((start_x + hall_width + 3 + j*4.5, start_y + height - main_height + 5.5), 
-                               3, 2, linewidth=1.5, edgecolor='#654321', facecolor='#dcc9a5')
-            ax.add_patch(cabinet)
+        cabinets = np.column_stack([
+            kx + 3 + np.arange(2) * 4.5,
+            np.full(2, ky + 5.5),
+            np.full(2, 3), np.full(2, 2)
+        ])
+        ax.add_collection(_box_collection(cabinets, linewidths=1.5, edgecolors=p.wood_deep, facecolors=p.wood_pale))
         
-        ax.text(start_x + hall_width + width/4, start_y + height - 2, 'KITCHEN', 
-               ha='center', fontsize=11, weight='bold', style='italic', color='#2c3e50')
+        ax.text(kx + width/4, start_y + height - 2, 'KITCHEN', 
+               ha='center', fontsize=11, weight='bold', style='italic', color=p.ink)
         
         # ============ BEDROOMS ============
         bedroom_height = (height - main_height) / bedrooms
-        
-        for bed_num in range(bedrooms):
-            bed_y = start_y + (bedrooms - bed_num - 1) * bedroom_height
-            
-            # Bedroom area
-            bedroom_rect = Rectangle((start_x + 1, bed_y + 1), hall_width - 2, bedroom_height - 2,
-                                    linewidth=2.5, edgecolor='#9b59b6', facecolor='#f4ecf7', alpha=0.6)
-            ax.add_patch(bedroom_rect)
-            
-            # Bed
-            bed = Rectangle((start_x + 3, bed_y + 3), 6, 4, 
-                           linewidth=2, edgecolor='#8b4513', facecolor='#f5deb3')
-            ax.add_patch(bed)
+        bed_ys = start_y + (bedrooms - np.arange(bedrooms) - 1) * bedroom_height
+        ones = np.ones(bedrooms)
+        
+        # Bedroom areas, beds and wardrobes
+        ax.add_collection(_box_collection(
+            np.column_stack([(start_x + 1) * ones, bed_ys + 1, (hall_width - 2) * ones, (bedroom_height - 2) * ones]),
+            linewidths=2.5, **_fill(p.bedroom_edge, p.bedroom_fill, 0.6)))
+        ax.add_collection(_box_collection(
+            np.column_stack([(start_x + 3) * ones, bed_ys + 3, 6 * ones, 4 * ones]),
+            linewidths=2, edgecolors=p.wood_dark, facecolors=p.linen))
+        ax.add_collection(_box_collection(
+            np.column_stack([(start_x + 10) * ones, bed_ys + 3, 3 * ones, 4 * ones]),
+            linewidths=2, **_fill(p.wood_deep, p.wood_medium, 0.7)))
+        
+        # Study table (in master bedroom)
+        study = Rectangle((start_x + 14, bed_ys[0] + 3), 3, 2, 
+                         linewidth=1.5, **_fill(p.wood_dark, p.wood_gold, 0.7))
+        ax.add_patch(study)
+        ax.text(start_x + 15.5, bed_ys[0] + 4, 'DESK', ha='center', fontsize=6, weight='bold')
+        
+        for bed_num, bed_y in enumerate(bed_ys):
             ax.text(start_x + 6, bed_y + 5, f'BED {bed_num + 1}', 
                    ha='center', va='center', fontsize=8, weight='bold')
-            
-            # Wardrobe
-            wardrobe = Rectangle((start_x + 10, bed_y + 3), 3, 4, 
-                                linewidth=2, edgecolor='#654321', facecolor='#d2691e', alpha=0.7)
-            ax.add_patch(wardrobe)
             ax.text(start_x + 11.5, bed_y + 5, 'W', ha='center', va='center', 
                    fontsize=7, weight='bold', color='white')
-            
-            # Study table (in master bedroom)
-            if bed_num == 0:
-                study = Rectangle((start_x + 14, bed_y + 3), 3, 2, 
-                                 linewidth=1.5, edgecolor='#8b4513', facecolor='#daa520', alpha=0.7)
-                ax.add_patch(study)
-                ax.text(start_x + 15.5, bed_y + 4, 'DESK', ha='center', fontsize=6, weight='bold')
-            
             ax.text(start_x + hall_width/2, bed_y + bedroom_height - 1, f'BEDROOM {bed_num + 1}', 
-                   ha='center', fontsize=9, weight='bold', style='italic', color='#2c3e50')
+                   ha='center', fontsize=9, weight='bold', style='italic', color=p.ink)
         
         # ============ BATHROOMS ============
         bath_y_start = start_y + height - main_height - (height - main_height) / (bathrooms + 1)
         bath_height = (height - main_height) / (bathrooms + 1.5)
-        
-        for bath_num in range(bathrooms):
-            bath_y = bath_y_start - bath_num * bath_height
-            
-            # Bathroom area
-            bathroom_rect = Rectangle((start_x + hall_width + 1, bath_y + 1), 
-                                     width - hall_width - 2, bath_height - 2,
-                                     linewidth=2.5, edgecolor='#16a085', facecolor='#d5f4e6', alpha=0.6)
-            ax.add_patch(bathroom_rect)
-            
-            # Bathtub
-            bathtub = Rectangle((start_x + hall_width + 3, bath_y + 2), 4, 2.5, 
-                               linewidth=2, edgecolor='#2c3e50', facecolor='#ecf0f1')
-            ax.add_patch(bathtub)
-            ax.text(start_x + hall_width + 5, bath_y + 3.2, 'TUB', ha='center', fontsize=7, weight='bold')
-            
-            # Toilet
-            toilet_bowl = Circle((start_x + hall_width + 9, bath_y + 3), 0.8, 
-                               color='#ecf0f1', ec='#2c3e50', linewidth=2)
-            ax.add_patch(toilet_bowl)
-            ax.text(start_x + hall_width + 9, bath_y + 3, 'T', ha='center', va='center', 
+        bath_ys = bath_y_start - np.arange(bathrooms) * bath_height
+        ones = np.ones(bathrooms)
+        
+        # Bathroom areas, bathtubs, toilets and sinks
+        ax.add_collection(_box_collection(
+            np.column_stack([(kx + 1) * ones, bath_ys + 1,
+                             (width - hall_width - 2) * ones, (bath_height - 2) * ones]),
+            linewidths=2.5, **_fill(p.bathroom_edge, p.bathroom_fill, 0.6)))
+        ax.add_collection(_box_collection(
+            np.column_stack([(kx + 3) * ones, bath_ys + 2, 4 * ones, 2.5 * ones]),
+            linewidths=2, edgecolors=p.ink, facecolors=p.cloud))
+        ax.add_collection(EllipseCollection(
+            1.6 * ones, 1.6 * ones, 0 * ones, units='xy',
+            offsets=np.column_stack([(kx + 9) * ones, bath_ys + 3]), offset_transform=ax.transData,
+            facecolors=p.cloud, edgecolors=p.ink, linewidths=2))
+        ax.add_collection(_box_collection(
+            np.column_stack([(kx + 11) * ones, bath_ys + 2, 3 * ones, 2 * ones]),
+            linewidths=2, edgecolors=p.ink, facecolors=p.silver))
+        
+        for bath_num, bath_y in enumerate(bath_ys):
+            ax.text(kx + 5, bath_y + 3.2, 'TUB', ha='center', fontsize=7, weight='bold')
+            ax.text(kx + 9, bath_y + 3, 'T', ha='center', va='center', 
                    fontsize=6, weight='bold')
-            
-            # Sink
-            bath_sink = Rectangle((start_x + hall_width + 11, bath_y + 2), 3, 2, 
-                                 linewidth=2, edgecolor='#2c3e50', facecolor='#bdc3c7')
-            ax.add_patch(bath_sink)
-            ax.text(start_x + hall_width + 12.5, bath_y + 3, 'SINK', ha='center', fontsize=7, weight='bold')
-            
-            ax.text(start_x + hall_width + (width - hall_width)/2, bath_y + bath_height - 0.5, 
+            ax.text(kx + 12.5, bath_y + 3, 'SINK', ha='center', fontsize=7, weight='bold')
+            ax.text(kx + (width - hall_width)/2, bath_y + bath_height - 0.5, 
                    f'BATHROOM {bath_num + 1}', ha='center', fontsize=8, weight='bold', 
-                   style='italic', color='#2c3e50')
+                   style='italic', color=p.ink)
         
         # ============ DOORS & WINDOWS ============
         # Entry door
-        door = Rectangle((start_x + hall_width - 1, start_y), 2, 0.5, 
-                        linewidth=2, edgecolor='#8b4513', facecolor='#cd853f')
-        ax.add_patch(door)
-        ax.text(start_x + hall_width - 0.5, start_y - 1, '🚪 MAIN DOOR', ha='center', fontsize=8, weight='bold')
+        door_x, door_y = anchors['door']
+        _rect(ax, anchors['door'], -1, 0, 2, 0.5, linewidth=2, edgecolor=p.wood_dark, facecolor=p.wood_tan)
+        ax.text(door_x - 0.5, door_y - 1, 'MAIN DOOR', ha='center', fontsize=8, weight='bold')
         
         # Windows (exterior walls)
-        window_positions = [
-            (start_x - 0.2, start_y + 15),  # Left wall
-            (start_x - 0.2, start_y + 35),
-            (start_x + width + 0.2, start_y + 15),  # Right wall
-            (start_x + width + 0.2, start_y + 35),
-            (start_x + 20, start_y - 0.2),  # Front wall
-            (start_x + 40, start_y - 0.2),
-        ]
-        
-        for wx, wy in window_positions[:min(4, 6)]:
-            window = Rectangle((wx - 0.3, wy - 0.3), 0.6, 0.6, 
-                             linewidth=2, edgecolor='#3498db', facecolor='#87ceeb', alpha=0.8)
-            ax.add_patch(window)
+        sides = _WINDOW_OFFSETS[:, 0]
+        window_xs = start_x + np.where(sides > 0, width, 0) + sides - 0.3
+        window_ys = start_y + _WINDOW_OFFSETS[:, 1] - 0.3
+        ax.add_collection(_box_collection(
+            np.column_stack([window_xs, window_ys, np.full((len(sides), 2), 0.6)]),
+            linewidths=2, **_fill(p.glass_edge, p.glass_fill, 0.8)))
         
         # ============ TITLE & MEASUREMENTS ============
         ax.text(70, 115, f'{style.upper()} HOME - COMPLETE FLOOR PLAN', 
-               ha='center', fontsize=16, weight='bold', color='#2c3e50',
-               bbox=dict(boxstyle='round', facecolor='#ecf0f1', edgecolor='#2c3e50', linewidth=2))
+               ha='center', fontsize=16, weight='bold', color=p.ink,
+               bbox=TITLE_BBOX)
         
         # Measurements info
         info_text = f'Total Area: {area:.0f} sq ft | Width: {width:.1f}m | Length: {height:.1f}m\nBedrooms: {bedrooms} | Bathrooms: {bathrooms}'
         ax.text(70, 4, info_text, ha='center', fontsize=10, style='italic',
-               bbox=dict(boxstyle='round', facecolor='#f9e79f', edgecolor='#2c3e50', linewidth=1.5))
+               bbox=INFO_BBOX)
         
         # Scale and legend
         ax.text(10, 4, '═════════════════════════════', ha='left', fontsize=9, family='monospace')
-        ax.text(10, 1, 'LEGEND: Proper Scale ◯ Windows | 🚪 Doors | Measurements in meters', 
+        ax.text(10, 1, 'LEGEND: Proper Scale ◯ Windows | ▬ Doors | Measurements in meters', 
                ha='left', fontsize=9, weight='bold')
         
-        # Remove axes
-        ax.set_xticks([])
-        ax.set_yticks([])
-        ax.spines['top'].set_visible(False)
-        ax.spines['right'].set_visible(False)
-        ax.spines['bottom'].set_visible(False)
-        ax.spines['left'].set_visible(False)
-        
-        plt.tight_layout()
         return fig
     
     def draw_3d_house_view(self, bedrooms: int, style: str):
@@ -496,42 +1067,30 @@ Compliance Guide:"""
         width = 15
         height = 10
         
-        # Draw house outline (3D representation)
-        # Front face
-        front_x = [0, length, length, 0, 0]
-        front_y = [0, 0, 0, 0, 0]
-        front_z = [0, 0, height, height, 0]
-        
-        fig.add_trace(go.Scatter3d(x=front_x, y=front_y, z=front_z, 
-                                   mode='lines', name='Front Wall', 
-                                   line=dict(color='black', width=2)))
-        
-        # Back face
-        back_x = [0, length, length, 0, 0]
-        back_y = [width, width, width, width, width]
-        back_z = [0, 0, height, height, 0]
-        
-        fig.add_trace(go.Scatter3d(x=back_x, y=back_y, z=back_z,
-                                   mode='lines', name='Back Wall',
-                                   line=dict(color='black', width=2)))
-        
-        # Side connections
-        fig.add_trace(go.Scatter3d(x=[0, 0], y=[0, width], z=[0, 0],
-                                   mode='lines', line=dict(color='black', width=2), showlegend=False))
-        fig.add_trace(go.Scatter3d(x=[length, length], y=[0, width], z=[0, 0],
-                                   mode='lines', line=dict(color='black', width=2), showlegend=False))
-        fig.add_trace(go.Scatter3d(x=[0, 0], y=[0, width], z=[height, height],
-                                   mode='lines', line=dict(color='black', width=2), showlegend=False))
-        fig.add_trace(go.Scatter3d(x=[length, length], y=[0, width], z=[height, height],
-                                   mode='lines', line=dict(color='black', width=2), showlegend=False))
-        
-        # Roof (triangle)
+        # Walls and roof as one triangulated mesh: 8 box corners plus the roof peak
         roof_peak_z = height + 5
-        roof_x = [0, length, length/2, 0]
-        roof_y = [0, 0, width/2, 0]
-        roof_z = [height, height, roof_peak_z, height]
-        
-        fig.add_trace(go.Scatter3d(x=roof_x, y=roof_y, z=roof_z,
+        vertices = np.array([
+            [0, 0, 0], [length, 0, 0], [length, width, 0], [0, width, 0],
+            [0, 0, height], [length, 0, height], [length, width, height], [0, width, height],
+            [length/2, width/2, roof_peak_z],
+        ])
+        triangles = np.array([
+            [0, 1, 2], [0, 2, 3],  # Floor
+            [4, 5, 6], [4, 6, 7],  # Ceiling
+            [0, 1, 5], [0, 5, 4],  # Front wall
+            [1, 2, 6], [1, 6, 5],  # Right wall
+            [2, 3, 7], [2, 7, 6],  # Back wall
+            [3, 0, 4], [3, 4, 7],  # Left wall
+            [4, 5, 8], [5, 6, 8], [6, 7, 8], [7, 4, 8],  # Roof
+        ])
+        
+        fig.add_trace(go.Mesh3d(x=vertices[:, 0], y=vertices[:, 1], z=vertices[:, 2],
+                                i=triangles[:, 0], j=triangles[:, 1], k=triangles[:, 2],
+                                name='House', color='lightgray', opacity=0.6, showlegend=True))
+        
+        # Roof outline: eaves and two hips, then a break (None) and the other two hips
+        roof = np.insert(vertices[[4, 5, 6, 7, 4, 8, 6, 5, 8, 7]].astype(object), 7, None, axis=0)
+        fig.add_trace(go.Scatter3d(x=roof[:, 0], y=roof[:, 1], z=roof[:, 2],
                                    mode='lines', name='Roof', 
                                    line=dict(color='red', width=3)))
         
@@ -564,342 +1123,387 @@ Compliance Guide:"""
         
         return fig
     
-    def generate_3d_visualization_guide(self, style: str, rooms: str, materials: str) -> Optional[str]:
-        """Generate SketchUp modeling and 3D visualization guide"""
-        try:
-            prompt = f"""You are an expert in SketchUp modeling and 3D architectural visualization.
-
-Provide a comprehensive guide for creating a 3D model in SketchUp with these specifications:
-- Architectural Style: {style}
+    def _visualization_request(self, style: str, rooms: str, materials: str) -> tuple:
+        """Build the Ollama request for the SketchUp guide"""
+        prompt = f"""- Architectural Style: {style}
 - Rooms/Spaces: {rooms}
 - Primary Materials: {materials}
 
-Include:
-1. SketchUp Setup & Best Practices
-2. Step-by-step modeling instructions for:
-   - Foundation and floor planning
-   - Wall construction
-   - Roof design
-   - Doors and windows placement
-3. Material and texture application
-4. Lighting setup for realistic rendering
-5. Camera angles for presentations
-6. Adding details (fixtures, furniture, landscaping)
-7. Rendering settings for high-quality output
-8. Export options for presentations
-9. Common mistakes to avoid
-10. Tips for realistic visualization
-
-Make it practical and actionable for someone using SketchUp.
-
 3D Visualization Guide:"""
+        
+        return ("visualization", VISUALIZATION_SYSTEM, prompt, _options(0.4, VISUALIZATION_SYSTEM), 'No guide generated.')
+    
+    def generate_3d_visualization_guide(self, style: str, rooms: str, materials: str) -> Optional[str]:
+        """Generate SketchUp modeling and 3D visualization guide"""
+        return self._generate(*self._visualization_request(style, rooms, materials))
+    
+    def stream_3d_visualization_guide(self, style: str, rooms: str, materials: str) -> Iterator[str]:
+        """Stream the SketchUp guide as it is generated"""
+        return self._stream_generate(*self._visualization_request(style, rooms, materials))
+    
+    def _report_request(self, specifications: Dict) -> tuple:
+        """Build the single Ollama request for the design, materials, budget and compliance report"""
+        prompt = f"""Building Type: {specifications.get('building_type', 'Not specified')}
+Total Area: {specifications.get('total_area', 'Not specified')} sq ft
+Number of Floors: {specifications.get('num_floors', 'Not specified')}
+Number of Bedrooms: {specifications.get('bedrooms', 'Not specified')}
+Budget: {specifications.get('budget', 'Not specified')}
+Climate/Location: {specifications.get('climate', 'Not specified')}
+Special Requirements: {specifications.get('special_req', 'None')}
 
-            payload = {
-                "model": self.model,
-                "prompt": prompt,
-                "stream": False,
-                "options": {
-                    "temperature": 0.4,
-                    "top_p": 0.9
-                }
-            }
-            
-            response = requests.post(
-                f"{self.base_url}/api/generate",
-                json=payload,
-                timeout=120
-            )
-            
-            if response.status_code == 200:
-                result = response.json()
-                return result.get('response', 'No guide generated.')
-            return None
-            
-        except requests.exceptions.Timeout:
-            st.error("Request timed out.")
-            return None
-        except requests.exceptions.RequestException as e:
-            st.error(f"Error: {str(e)}")
+Report:"""
+        
+        # Four sections in one answer need a longer budget than the single-topic prompts
+        return ("report", FULL_REPORT_SYSTEM, prompt,
+                _options(0.3, FULL_REPORT_SYSTEM, num_predict=3072), '')
+    
+    def get_full_report(self, specifications: Dict) -> Optional[Dict[str, Optional[str]]]:
+        """Get design, materials, budget and compliance sections from a single generation"""
+        report = self._generate(*self._report_request(specifications), validate=_report_complete)
+        if not report:
             return None
+        return _split_report(report)
     
-    def draw_interior_design_complete(self, bedrooms: int, bathrooms: int, area: float, style: str):
-        """Draw complete interior design with 4 detailed room views"""
-        fig = plt.figure(figsize=(20, 16))
-        
-        # Main grid for 4 subplots
-        gs = fig.add_gridspec(2, 2, hspace=0.3, wspace=0.3)
-        
-        # ==================== 1. LIVING ROOM HALL ====================
-        ax1 = fig.add_subplot(gs[0, 0])
-        ax1.set_xlim(0, 100)
-        ax1.set_ylim(0, 100)
-        ax1.set_aspect('equal')
-        ax1.set_facecolor('#fef5e7')
-        
-        # Hall floor
-        hall_floor = Rectangle((5, 5), 90, 70, linewidth=3, edgecolor='#2c3e50', facecolor='#f0e68c', alpha=0.3)
-        ax1.add_patch(hall_floor)
-        
-        # Walls
-        ax1.plot([5, 5, 95, 95, 5], [5, 75, 75, 5, 5], 'k-', linewidth=4)
-        
-        # Sofa
-        sofa = Rectangle((10, 50), 20, 12, linewidth=2.5, edgecolor='#8b4513', facecolor='#d4a574', alpha=0.8)
-        ax1.add_patch(sofa)
-        ax1.text(20, 56, 'SOFA', ha='center', va='center', fontsize=11, weight='bold', color='#2c3e50')
-        
-        # Coffee table
-        coffee = Rectangle((35, 48), 15, 10, linewidth=2, edgecolor='#654321', facecolor='#cd853f', alpha=0.7)
-        ax1.add_patch(coffee)
-        ax1.text(42.5, 53, 'COFFEE\nTABLE', ha='center', va='center', fontsize=9, weight='bold', color='white')
-        
-        # TV Unit
-        tv_unit = Rectangle((60, 45), 25, 15, linewidth=2.5, edgecolor='#2c3e50', facecolor='#34495e', alpha=0.8)
-        ax1.add_patch(tv_unit)
-        # TV screen
-        tv_screen = Rectangle((63, 50), 18, 8, linewidth=1, edgecolor='black', facecolor='#1c1c1c', alpha=0.9)
-        ax1.add_patch(tv_screen)
-        ax1.text(72, 54, '📺 TV', ha='center', va='center', fontsize=10, weight='bold', color='white')
-        
-        # Dining table
-        dining = Rectangle((15, 15), 25, 20, linewidth=2.5, edgecolor='#8b4513', facecolor='#daa520', alpha=0.7)
-        ax1.add_patch(dining)
-        ax1.text(27.5, 25, 'DINING\nTABLE', ha='center', va='center', fontsize=10, weight='bold', color='#2c3e50')
-        
-        # Dining chairs (4 around table)
-        for cx, cy in [(10, 15), (40, 15), (10, 35), (40, 35)]:
-            chair = Rectangle((cx, cy), 4, 4, linewidth=1.5, edgecolor='#654321', facecolor='#d4a574')
-            ax1.add_patch(chair)
-            ax1.text(cx+2, cy+2, '🪑', ha='center', va='center', fontsize=8)
-        
-        # Wall decorations
-        ax1.text(8, 40, '🖼️', fontsize=16)
-        ax1.text(92, 60, '🖼️', fontsize=16)
-        ax1.text(8, 10, '🪴', fontsize=14)
-        
-        # Windows
-        ax1.add_patch(Rectangle((25, 75.5), 15, 2, linewidth=2, edgecolor='#3498db', facecolor='#87ceeb', alpha=0.8))
-        ax1.add_patch(Rectangle((60, 75.5), 15, 2, linewidth=2, edgecolor='#3498db', facecolor='#87ceeb', alpha=0.8))
-        
-        ax1.set_xticks([])
-        ax1.set_yticks([])
-        ax1.spines['top'].set_visible(False)
-        ax1.spines['right'].set_visible(False)
-        ax1.spines['bottom'].set_visible(False)
-        ax1.spines['left'].set_visible(False)
-        ax1.text(50, 95, '🏠 LIVING ROOM / HALL', ha='center', fontsize=13, weight='bold', style='italic')
-        ax1.text(50, 0, 'Main entertaining space with comfortable seating & dining', ha='center', fontsize=9, style='italic')
-        
-        # ==================== 2. KITCHEN ====================
-        ax2 = fig.add_subplot(gs[0, 1])
-        ax2.set_xlim(0, 100)
-        ax2.set_ylim(0, 100)
-        ax2.set_aspect('equal')
-        ax2.set_facecolor('#fef5e7')
-        
-        # Kitchen floor
-        kitchen_floor = Rectangle((5, 5), 90, 70, linewidth=3, edgecolor='#2c3e50', facecolor='#fff8dc', alpha=0.4)
-        ax2.add_patch(kitchen_floor)
-        
-        # Walls
-        ax2.plot([5, 5, 95, 95, 5], [5, 75, 75, 5, 5], 'k-', linewidth=4)
-        
-        # Countertop (L-shaped)
-        counter_h = Rectangle((10, 10), 35, 8, linewidth=2, edgecolor='#34495e', facecolor='#95a5a6', alpha=0.7)
-        ax2.add_patch(counter_h)
-        counter_v = Rectangle((45, 10), 8, 30, linewidth=2, edgecolor='#34495e', facecolor='#95a5a6', alpha=0.7)
-        ax2.add_patch(counter_v)
-        
-        # Stove
-        stove = Rectangle((12, 20), 10, 10, linewidth=2.5, edgecolor='#2c3e50', facecolor='#7f8c8d', alpha=0.8)
-        ax2.add_patch(stove)
-        for i, (ox, oy) in enumerate([(2, 2), (7, 2), (2, 7), (7, 7)]):
-            circle = Circle((14+ox, 25+oy), 1.2, color='#34495e', ec='black', linewidth=1.5)
-            ax2.add_patch(circle)
-        ax2.text(17, 15, 'STOVE', ha='center', fontsize=9, weight='bold', color='white')
-        
-        # Refrigerator
-        fridge = Rectangle((30, 18), 12, 14, linewidth=2.5, edgecolor='#34495e', facecolor='#b0c4de', alpha=0.8)
-        ax2.add_patch(fridge)
-        ax2.text(36, 25, 'FRIDGE', ha='center', fontsize=9, weight='bold', color='#2c3e50')
+    def stream_full_report(self, specifications: Dict) -> Iterator[str]:
+        """Stream the combined report; split the joined text with _split_report"""
+        return self._stream_generate(*self._report_request(specifications), validate=_report_complete)
+    
+    async def gather_all(self, specifications: Dict, materials: tuple, budget: tuple, compliance: tuple,
+                         visualization: tuple) -> Dict[str, Optional[str]]:
+        """Run all five LLM generations concurrently
+        
+        specifications is the design spec; the tuples hold the arguments of get_material_recommendations,
+        get_budget_estimation, get_compliance_guide and generate_3d_visualization_guide, so results share
+        the response cache with the single-topic tabs.
+        """
+        batch = [
+            self._design_request(specifications),
+            self._materials_request(*materials),
+            self._budget_request(*budget),
+            self._compliance_request(*compliance),
+            self._visualization_request(*visualization),
+        ]
         
-        # Sink
-        sink = Rectangle((12, 30), 12, 8, linewidth=2, edgecolor='#2c3e50', facecolor='#b0e0e6', alpha=0.8)
-        ax2.add_patch(sink)
-        ax2.text(18, 34, 'SINK', ha='center', fontsize=8, weight='bold', color='#2c3e50')
-        
-        # Microwave
-        microwave = Rectangle((28, 32), 8, 8, linewidth=2, edgecolor='#34495e', facecolor='#d3d3d3', alpha=0.7)
-        ax2.add_patch(microwave)
-        ax2.text(32, 36, '📶', ha='center', fontsize=10)
-        
-        # Island/Prep table
-        island = Rectangle((55, 25), 25, 18, linewidth=2.5, edgecolor='#8b4513', facecolor='#daa520', alpha=0.6)
-        ax2.add_patch(island)
-        ax2.text(67.5, 34, 'PREP/\nDINING', ha='center', va='center', fontsize=9, weight='bold', color='#2c3e50')
-        
-        # Stools
-        for sx in [58, 63, 68, 73, 78]:
-            stool = Rectangle((sx, 20), 3, 3, linewidth=1.5, edgecolor='#654321', facecolor='#d4a574')
-            ax2.add_patch(stool)
-        
-        # Cabinet storage
-        for cx in [10, 25, 40]:
-            cabinet = Rectangle((cx, 40), 10, 15, linewidth=1.5, edgecolor='#654321', facecolor='#dcc9a5', alpha=0.7)
-            ax2.add_patch(cabinet)
-        
-        # Window
-        ax2.add_patch(Rectangle((70, 75.5), 20, 2, linewidth=2, edgecolor='#3498db', facecolor='#87ceeb', alpha=0.8))
-        
-        ax2.set_xticks([])
-        ax2.set_yticks([])
-        ax2.spines['top'].set_visible(False)
-        ax2.spines['right'].set_visible(False)
-        ax2.spines['bottom'].set_visible(False)
-        ax2.spines['left'].set_visible(False)
-        ax2.text(50, 95, '🍳 KITCHEN', ha='center', fontsize=13, weight='bold', style='italic')
-        ax2.text(50, 0, 'Well-equipped kitchen with stove, refrigerator, sink & storage', ha='center', fontsize=9, style='italic')
-        
-        # ==================== 3. MASTER BEDROOM ====================
-        ax3 = fig.add_subplot(gs[1, 0])
-        ax3.set_xlim(0, 100)
-        ax3.set_ylim(0, 100)
-        ax3.set_aspect('equal')
-        ax3.set_facecolor('#fef5e7')
-        
-        # Bedroom floor
-        bed_floor = Rectangle((5, 5), 90, 70, linewidth=3, edgecolor='#2c3e50', facecolor='#f4ecf7', alpha=0.4)
-        ax3.add_patch(bed_floor)
-        
-        # Walls
-        ax3.plot([5, 5, 95, 95, 5], [5, 75, 75, 5, 5], 'k-', linewidth=4)
-        
-        # King bed
-        bed = Rectangle((15, 35), 40, 30, linewidth=2.5, edgecolor='#8b4513', facecolor='#f5deb3', alpha=0.8)
-        ax3.add_patch(bed)
-        pillow = Rectangle((15, 60), 40, 5, linewidth=1, edgecolor='#daa520', facecolor='#fff8dc', alpha=0.9)
-        ax3.add_patch(pillow)
-        ax3.text(35, 50, '🛏️ BED', ha='center', va='center', fontsize=12, weight='bold', color='#2c3e50')
-        
-        # Bedside tables
-        for bx in [10, 60]:
-            bedside = Rectangle((bx, 45), 8, 10, linewidth=1.5, edgecolor='#654321', facecolor='#d2691e', alpha=0.7)
-            ax3.add_patch(bedside)
-            ax3.text(bx+4, 50, '💡', ha='center', fontsize=9)
-        
-        # Wardrobe
-        wardrobe = Rectangle((62, 25), 18, 35, linewidth=2.5, edgecolor='#654321', facecolor='#d2691e', alpha=0.8)
-        ax3.add_patch(wardrobe)
-        ax3.text(71, 42.5, 'WARDROBE', ha='center', va='center', fontsize=9, weight='bold', color='white')
-        ax3.plot([62, 80], [35, 35], 'k-', linewidth=1)
-        ax3.plot([62, 80], [45, 45], 'k-', linewidth=1)
-        
-        # Study desk
-        desk = Rectangle((10, 10), 20, 12, linewidth=2, edgecolor='#8b4513', facecolor='#daa520', alpha=0.7)
-        ax3.add_patch(desk)
-        ax3.text(20, 16, 'DESK', ha='center', fontsize=8, weight='bold', color='#2c3e50')
-        
-        # Study chair
-        chair = Rectangle((32, 10), 6, 8, linewidth=1.5, edgecolor='#654321', facecolor='#d4a574')
-        ax3.add_patch(chair)
-        ax3.text(35, 14, '🪑', ha='center', fontsize=9)
-        
-        # Sofa/Lounge
-        sofa_bed = Rectangle((45, 10), 15, 12, linewidth=2, edgecolor='#8b4513', facecolor='#d4a574', alpha=0.7)
-        ax3.add_patch(sofa_bed)
-        ax3.text(52.5, 16, 'LOUNGE', ha='center', fontsize=8, weight='bold', color='#2c3e50')
-        
-        # Windows (2 large windows)
-        ax3.add_patch(Rectangle((25, 75.5), 18, 2, linewidth=2, edgecolor='#3498db', facecolor='#87ceeb', alpha=0.8))
-        ax3.add_patch(Rectangle((60, 75.5), 18, 2, linewidth=2, edgecolor='#3498db', facecolor='#87ceeb', alpha=0.8))
-        
-        # Decorations
-        ax3.text(8, 70, '🖼️', fontsize=14)
-        ax3.text(90, 25, '🪴', fontsize=13)
-        
-        ax3.set_xticks([])
-        ax3.set_yticks([])
-        ax3.spines['top'].set_visible(False)
-        ax3.spines['right'].set_visible(False)
-        ax3.spines['bottom'].set_visible(False)
-        ax3.spines['left'].set_visible(False)
-        ax3.text(50, 95, '🛏️ MASTER BEDROOM', ha='center', fontsize=13, weight='bold', style='italic')
-        ax3.text(50, 0, 'Spacious bedroom with king bed, wardrobe, study area & seating', ha='center', fontsize=9, style='italic')
-        
-        # ==================== 4. BATHROOM ====================
-        ax4 = fig.add_subplot(gs[1, 1])
-        ax4.set_xlim(0, 100)
-        ax4.set_ylim(0, 100)
-        ax4.set_aspect('equal')
-        ax4.set_facecolor('#fef5e7')
-        
-        # Bathroom floor (tile pattern)
-        bath_floor = Rectangle((5, 5), 90, 70, linewidth=3, edgecolor='#2c3e50', facecolor='#d5f4e6', alpha=0.4)
-        ax4.add_patch(bath_floor)
-        
-        # Walls
-        ax4.plot([5, 5, 95, 95, 5], [5, 75, 75, 5, 5], 'k-', linewidth=4)
-        
-        # Bathtub
-        bathtub = Rectangle((10, 40), 30, 20, linewidth=2.5, edgecolor='#2c3e50', facecolor='#e8f8f5', alpha=0.9)
-        ax4.add_patch(bathtub)
-        ax4.text(11, 38, '🚿', fontsize=12)
-        ax4.text(30, 60, 'BATHTUB', ha='center', fontsize=10, weight='bold', color='#2c3e50')
-        
-        # Shower area
-        shower = Rectangle((50, 35), 20, 25, linewidth=2, edgecolor='#2c3e50', facecolor='#b0e0e6', alpha=0.6)
-        ax4.add_patch(shower)
-        ax4.text(60, 47.5, 'SHOWER\nCUBICLE', ha='center', fontsize=9, weight='bold', color='#2c3e50')
-        ax4.text(60, 62, '🚿', fontsize=14)
-        
-        # Toilet
-        toilet_circle = Circle((75, 50), 5, color='#ecf0f1', ec='#2c3e50', linewidth=2.5)
-        ax4.add_patch(toilet_circle)
-        ax4.text(75, 50, 'TOILET', ha='center', va='center', fontsize=8, weight='bold', color='#2c3e50')
-        
-        # Vanity/Sink
-        vanity = Rectangle((10, 15), 35, 12, linewidth=2, edgecolor='#34495e', facecolor='#95a5a6', alpha=0.7)
-        ax4.add_patch(vanity)
-        ax4.add_patch(Rectangle((13, 18), 7, 7, linewidth=1.5, edgecolor='#2c3e50', facecolor='#b0e0e6', alpha=0.8))
-        ax4.add_patch(Rectangle((28, 18), 7, 7, linewidth=1.5, edgecolor='#2c3e50', facecolor='#b0e0e6', alpha=0.8))
-        ax4.text(17, 15, 'SINK', ha='center', fontsize=7, weight='bold')
-        ax4.text(32, 15, 'SINK', ha='center', fontsize=7, weight='bold')
-        ax4.text(30, 25, 'VANITY COUNTER', ha='center', fontsize=8, weight='bold', color='white')
-        
-        # Mirror
-        ax4.add_patch(Rectangle((48, 18), 25, 12, linewidth=2, edgecolor='#7f8c8d', facecolor='#e8e8e8', alpha=0.7))
-        ax4.text(60.5, 24, '🪞 MIRROR', ha='center', fontsize=9, weight='bold', color='#2c3e50')
-        
-        # Storage cabinet
-        cabinet = Rectangle((75, 15), 15, 12, linewidth=1.5, edgecolor='#654321', facecolor='#d2691e', alpha=0.6)
-        ax4.add_patch(cabinet)
-        ax4.text(82.5, 21, 'STORAGE', ha='center', fontsize=7, weight='bold', color='white')
-        
-        # Window/Exhaust vent
-        ax4.add_patch(Rectangle((40, 75.5), 20, 2, linewidth=2, edgecolor='#3498db', facecolor='#87ceeb', alpha=0.8))
-        ax4.text(80, 10, '💨', fontsize=11)
-        
-        ax4.set_xticks([])
-        ax4.set_yticks([])
-        ax4.spines['top'].set_visible(False)
-        ax4.spines['right'].set_visible(False)
-        ax4.spines['bottom'].set_visible(False)
-        ax4.spines['left'].set_visible(False)
-        ax4.text(50, 95, '🚿 BATHROOM', ha='center', fontsize=13, weight='bold', style='italic')
-        ax4.text(50, 0, 'Modern bathroom with bathtub, shower, toilet, dual sinks & storage', ha='center', fontsize=9, style='italic')
-        
-        # ==================== MAIN TITLE ====================
-        fig.suptitle(f'🏠 COMPLETE {style.upper()} HOME - INTERIOR DESIGN LAYOUT 🏠', 
-                    fontsize=18, weight='bold', y=0.98, color='#2c3e50',
-                    bbox=dict(boxstyle='round,pad=0.8', facecolor='#f9e79f', edgecolor='#2c3e50', linewidth=2))
-        
-        # Overall info
-        info_text = f'Total Area: {area:.0f} sq ft | Bedrooms: {bedrooms} | Bathrooms: {bathrooms}'
-        fig.text(0.5, 0.01, info_text, ha='center', fontsize=11, weight='bold', style='italic',
-                bbox=dict(boxstyle='round', facecolor='#ecf0f1', edgecolor='#2c3e50', linewidth=1.5))
-        
-        plt.tight_layout(rect=[0, 0.03, 1, 0.96])
+        if aiohttp is None:
+            # _generate reports failures with st.error, which needs the script's context on the worker thread
+            ctx = get_script_run_ctx()
+            
+            def generate(request: tuple) -> Optional[str]:
+                add_script_run_ctx(threading.current_thread(), ctx)
+                return self._generate(*request)
+            
+            results = await asyncio.gather(*(asyncio.to_thread(generate, request) for request in batch))
+        else:
+            # The session is bound to this event loop, so it lives for one batch
+            async with aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=16),
+                timeout=aiohttp.ClientTimeout(total=120)
+            ) as http:
+                results = await asyncio.gather(*(self._agenerate(http, *request) for request in batch))
+        return dict(zip(["design", "materials", "budget", "compliance", "visualization"], results))
+
+    def run_all(self, specifications: Dict, materials: tuple, budget: tuple, compliance: tuple,
+                visualization: tuple) -> Dict[str, Optional[str]]:
+        """Synchronous wrapper around gather_all for the Streamlit script"""
+        return asyncio.run(self.gather_all(specifications, materials, budget, compliance, visualization))
+
+    def _ensure_fig(self, style: str) -> Figure:
+        """Build the four room views once, rebuilding only when the style's palette differs"""
+        p = _palette(style)
+        if self._fig is None or self._fig_palette is not p:
+            self._fig, self._suptitle, self._info_text = _build_interior_fig(p)
+            self._fig_palette = p
+        return self._fig
+    
+    def _update_fig(self, bedrooms: int, bathrooms: int, area: float, style: str) -> Figure:
+        """Point the persistent figure at this plan; caller holds _fig_lock"""
+        fig = self._ensure_fig(style)
+        self._suptitle.set_text(f'COMPLETE {style.upper()} HOME - INTERIOR DESIGN LAYOUT')
+        self._info_text.set_text(f'Total Area: {area:.0f} sq ft | Bedrooms: {bedrooms} | Bathrooms: {bathrooms}')
         return fig
+    
+    def draw_interior_design_complete(self, bedrooms: int, bathrooms: int, area: float, style: str) -> go.Figure:
+        """Draw complete interior design with 4 detailed room views
+        
+        Returns an independent Plotly copy that the browser draws, skipping server-side rasterization.
+        The shared matplotlib figure never leaves _fig_lock, since any session may retitle it.
+        """
+        with self._fig_lock:
+            return _figure_plotly(self._update_fig(bedrooms, bathrooms, area, style))
+    
+    def interior_design_png(self, bedrooms: int, bathrooms: int, area: float, style: str, dpi: int) -> bytes:
+        """Rasterize the interior design while no other session can retitle the shared figure"""
+        with self._fig_lock:
+            return _figure_png(self._update_fig(bedrooms, bathrooms, area, style), dpi)
+
+
+_ANCHORS_X: Final = {'center': 'center', 'left': 'left', 'right': 'right'}
+_ANCHORS_Y: Final = {'center': 'middle', 'center_baseline': 'middle', 'top': 'top', 'bottom': 'bottom',
+                     'baseline': 'bottom'}
+
+
+def _rgba(color) -> str:
+    r, g, b, a = to_rgba(color)
+    return f'rgba({r * 255:.0f}, {g * 255:.0f}, {b * 255:.0f}, {a:.3g})'
+
+
+def _figure_plotly(fig: Figure) -> go.Figure:
+    """Plotly layout shapes, line traces and annotations for a grid of PatchCollection/line/text axes"""
+    rows, cols = fig.axes[0].get_subplotspec().get_gridspec().get_geometry()
+    out = make_subplots(rows=rows, cols=cols, horizontal_spacing=0.02, vertical_spacing=0.04)
+    shapes, annotations, traces = [], [], []
+    
+    for ax in fig.axes:
+        spec = ax.get_subplotspec()
+        index = spec.rowspan.start * cols + spec.colspan.start + 1
+        suffix = str(index) if index > 1 else ''
+        refs = dict(xref=f'x{suffix}', yref=f'y{suffix}')
+        
+        # Shape-table PolyCollections and the Circle PatchCollections both store their paths in data coordinates
+        for collection in ax.collections:
+            faces, edges, widths = collection.get_facecolor(), collection.get_edgecolor(), collection.get_linewidth()
+            for i, path in enumerate(collection.get_paths()):
+                (x0, y0), (x1, y1) = path.get_extents().get_points().tolist()
+                curved = path.codes is not None and (path.codes == Path.CURVE4).any()
+                shapes.append(dict(
+                    type='circle' if curved else 'rect', x0=x0, y0=y0, x1=x1, y1=y1, layer='below',
+                    fillcolor=_rgba(faces[i % len(faces)]) if len(faces) else 'rgba(0, 0, 0, 0)',
+                    line=dict(color=_rgba(edges[i % len(edges)]) if len(edges) else 'rgba(0, 0, 0, 0)',
+                              width=float(widths[i % len(widths)])),
+                    **refs))
+        
+        for line in ax.lines:
+            xs, ys = line.get_data()
+            traces.append(go.Scatter(x=list(xs), y=list(ys), xaxis=refs['xref'], yaxis=refs['yref'], mode='lines',
+                                     hoverinfo='skip', showlegend=False,
+                                     line=dict(color=_rgba(line.get_color()), width=line.get_linewidth())))
+        
+        for text in ax.texts:
+            x, y = text.get_position()
+            label = text.get_text().replace('\n', '<br>')
+            if text.get_fontweight() in ('bold', 700):
+                label = f'<b>{label}</b>'
+            annotations.append(dict(
+                x=x, y=y, text=label, showarrow=False,
+                xanchor=_ANCHORS_X.get(text.get_horizontalalignment(), 'left'),
+                yanchor=_ANCHORS_Y.get(text.get_verticalalignment(), 'bottom'),
+                font=dict(size=text.get_fontsize(), color=_rgba(text.get_color())),
+                **refs))
+        
+        axis = dict(row=spec.rowspan.start + 1, col=spec.colspan.start + 1)
+        out.update_xaxes(range=list(ax.get_xlim()), visible=False, **axis)
+        out.update_yaxes(range=list(ax.get_ylim()), visible=False, scaleanchor=refs['xref'], **axis)
+    
+    # fig.texts holds the suptitle too; only the summary line goes below the grid
+    title = fig.get_suptitle()
+    for text in fig.texts:
+        if text.get_text() != title:
+            annotations.append(dict(x=0.5, y=0, xref='paper', yref='paper', yshift=-20, showarrow=False,
+                                    text=text.get_text(), font=dict(size=text.get_fontsize())))
+    
+    out.add_traces(traces)
+    out.update_layout(shapes=shapes, annotations=annotations, height=1000,
+                      title=dict(text=f'<b>{title}</b>', x=0.5, xanchor='center'),
+                      plot_bgcolor=_rgba(fig.axes[0].get_facecolor()), margin=dict(l=10, r=10, t=60, b=40))
+    return out
+
+
+def _build_interior_fig(p: Palette) -> tuple:
+    """Draw the 4 detailed room views; returns the figure with its blank title and summary texts"""
+    fig = Figure(figsize=(20, 16))
+    FigureCanvasAgg(fig)
+    
+    # Main grid for 4 subplots; fixed margins leave room for the title and summary
+    gs = fig.add_gridspec(2, 2, left=0.03, right=0.97, top=0.94, bottom=0.04, wspace=0.08, hspace=0.18)
+    
+    # ==================== 1. LIVING ROOM HALL ====================
+    ax1 = _blank_axes(fig.add_subplot(gs[0, 0], xticks=[], yticks=[]), p.room_background)
+    ax1.add_collection(_shape_collection(_HALL_SHAPES, p), autolim=False)
+    
+    # Walls
+    ax1.add_line(copy(_WALL_LINE))
+    
+    ax1.text(20, 56, 'SOFA', ha='center', va='center', fontsize=11, weight='bold', color=p.ink)
+    ax1.text(42.5, 53, 'COFFEE\nTABLE', ha='center', va='center', fontsize=9, weight='bold', color='white')
+    ax1.text(72, 54, 'TV', ha='center', va='center', fontsize=10, weight='bold', color='white')
+    ax1.text(27.5, 25, 'DINING\nTABLE', ha='center', va='center', fontsize=10, weight='bold', color=p.ink)
+    
+    # Wall decorations
+    ax1.text(10, 41, 'ART', ha='center', fontsize=7, weight='bold', color=p.steel)
+    ax1.text(88, 61, 'ART', ha='center', fontsize=7, weight='bold', color=p.steel)
+    ax1.text(11, 11, 'PLANT', ha='center', fontsize=7, weight='bold', color=p.steel)
+    
+    ax1.text(50, 95, 'LIVING ROOM / HALL', ha='center', fontsize=13, weight='bold', style='italic')
+    ax1.text(50, 0, 'Main entertaining space with comfortable seating & dining', ha='center', fontsize=9, style='italic')
+    
+    # ==================== 2. KITCHEN ====================
+    ax2 = _blank_axes(fig.add_subplot(gs[0, 1], xticks=[], yticks=[]), p.room_background)
+    ax2.add_collection(_shape_collection(_KITCHEN_SHAPES, p), autolim=False)
+    
+    # Walls
+    ax2.add_line(copy(_WALL_LINE))
+    
+    # Stove knobs
+    ax2.add_collection(PatchCollection([Circle(xy, 1.2) for xy in _STOVE_KNOBS],
+                                       facecolor=p.slate, edgecolor='black', linewidth=1.5), autolim=False)
+    
+    ax2.text(17, 15, 'STOVE', ha='center', fontsize=9, weight='bold', color='white')
+    ax2.text(36, 25, 'FRIDGE', ha='center', fontsize=9, weight='bold', color=p.ink)
+    ax2.text(18, 34, 'SINK', ha='center', fontsize=8, weight='bold', color=p.ink)
+    ax2.text(67.5, 34, 'PREP/\nDINING', ha='center', va='center', fontsize=9, weight='bold', color=p.ink)
+    
+    ax2.text(50, 95, 'KITCHEN', ha='center', fontsize=13, weight='bold', style='italic')
+    ax2.text(50, 0, 'Well-equipped kitchen with stove, refrigerator, sink & storage', ha='center', fontsize=9, style='italic')
+    
+    # ==================== 3. MASTER BEDROOM ====================
+    ax3 = _blank_axes(fig.add_subplot(gs[1, 0], xticks=[], yticks=[]), p.room_background)
+    ax3.add_collection(_shape_collection(_BEDROOM_SHAPES, p), autolim=False)
+    
+    # Walls
+    ax3.add_line(copy(_WALL_LINE))
+    
+    # Wardrobe doors
+    ax3.plot([62, 80], [35, 35], 'k-', linewidth=1)
+    ax3.plot([62, 80], [45, 45], 'k-', linewidth=1)
+    
+    ax3.text(35, 50, 'BED', ha='center', va='center', fontsize=12, weight='bold', color=p.ink)
+    ax3.text(71, 42.5, 'WARDROBE', ha='center', va='center', fontsize=9, weight='bold', color='white')
+    ax3.text(20, 16, 'DESK', ha='center', fontsize=8, weight='bold', color=p.ink)
+    ax3.text(52.5, 16, 'LOUNGE', ha='center', fontsize=8, weight='bold', color=p.ink)
+    for bx in _BEDSIDE_TABLES[:, 0]:
+        ax3.text(bx+4, 50, 'LAMP', ha='center', va='center', fontsize=7, weight='bold', color='white')
+    
+    # Decorations
+    ax3.text(10, 71, 'ART', ha='center', fontsize=7, weight='bold', color=p.steel)
+    ax3.text(87, 26, 'PLANT', ha='center', fontsize=7, weight='bold', color=p.steel)
+    
+    ax3.text(50, 95, 'MASTER BEDROOM', ha='center', fontsize=13, weight='bold', style='italic')
+    ax3.text(50, 0, 'Spacious bedroom with king bed, wardrobe, study area & seating', ha='center', fontsize=9, style='italic')
+    
+    # ==================== 4. BATHROOM ====================
+    ax4 = _blank_axes(fig.add_subplot(gs[1, 1], xticks=[], yticks=[]), p.room_background)
+    ax4.add_collection(_shape_collection(_BATHROOM_SHAPES, p), autolim=False)
+    
+    # Walls
+    ax4.add_line(copy(_WALL_LINE))
+    
+    # Toilet
+    ax4.add_collection(PatchCollection([Circle((75, 50), 5)], facecolor=p.cloud, edgecolor=p.ink, linewidth=2.5),
+                       autolim=False)
+    
+    ax4.text(30, 60, 'BATHTUB', ha='center', fontsize=10, weight='bold', color=p.ink)
+    ax4.text(60, 47.5, 'SHOWER\nCUBICLE', ha='center', fontsize=9, weight='bold', color=p.ink)
+    ax4.text(75, 50, 'TOILET', ha='center', va='center', fontsize=8, weight='bold', color=p.ink)
+    ax4.text(17, 15, 'SINK', ha='center', fontsize=7, weight='bold')
+    ax4.text(32, 15, 'SINK', ha='center', fontsize=7, weight='bold')
+    ax4.text(30, 25, 'VANITY COUNTER', ha='center', fontsize=8, weight='bold', color='white')
+    ax4.text(60.5, 24, 'MIRROR', ha='center', fontsize=9, weight='bold', color=p.ink)
+    ax4.text(82.5, 21, 'STORAGE', ha='center', fontsize=7, weight='bold', color='white')
+    ax4.text(82, 11, 'VENT', ha='center', fontsize=7, weight='bold', color=p.steel)
+    
+    ax4.text(50, 95, 'BATHROOM', ha='center', fontsize=13, weight='bold', style='italic')
+    ax4.text(50, 0, 'Modern bathroom with bathtub, shower, toilet, dual sinks & storage', ha='center', fontsize=9, style='italic')
+    
+    # ==================== MAIN TITLE ====================
+    suptitle = fig.suptitle('', fontsize=18, weight='bold', y=0.98, color=p.ink,
+                            bbox=BANNER_BBOX)
+    
+    # Overall info
+    info_text = fig.text(0.5, 0.01, '', ha='center', fontsize=11, weight='bold', style='italic',
+                         bbox=SUMMARY_BBOX)
+    
+    return fig, suptitle, info_text
+
+
+@st.cache_resource(show_spinner=False)
+def get_response_cache() -> SemanticCache:
+    """The one response cache of the process, so every planner reads and writes the same FAISS indexes"""
+    return SemanticCache()
+
+
+@st.cache_resource(show_spinner=False)
+def get_planner(base_url: str, model: Optional[str] = None) -> CivilHomePlanner:
+    """One planner (HTTP pool, response cache) per Ollama host and model for the whole process"""
+    planner = CivilHomePlanner(base_url, get_response_cache())
+    if model:
+        planner.model = model
+    return planner
+
+
+@st.cache_data(ttl=30, show_spinner=False)
+def _ping(base_url: str) -> bool:
+    """Whether the host answers /api/tags, probed at most every 30 seconds"""
+    return get_planner(base_url).check_connection(warm=False)
+
+
+@st.cache_data(ttl=30, show_spinner=False)
+def _list_models(base_url: str) -> tuple:
+    """Model names on the host, fetched from /api/tags at most every 30 seconds"""
+    return tuple(get_planner(base_url).get_available_models())
+
+
+def _figure_png(fig, dpi: int) -> bytes:
+    """Rasterize a matplotlib figure to PNG bytes
+    
+    The figures lay themselves out, so the whole canvas is saved as is: bbox_inches='tight' would
+    cost an extra draw just to measure it. zlib level 1 encodes several times faster than the default,
+    and no tEXt chunks are written since the Software stamp is the only metadata savefig would add.
+    """
+    buf = io.BytesIO()
+    fig.savefig(buf, format='png', dpi=dpi, metadata=PNG_METADATA,
+                pil_kwargs={'optimize': False, 'compress_level': 1})
+    return buf.getvalue()
+
+
+# Floor plan PNG encodes run here, so the rest of the page renders while Agg and zlib work
+_PNG_POOL: Final = ThreadPoolExecutor(max_workers=2, thread_name_prefix="png")
+
+
+def plan_geometry(bedrooms, bathrooms, area, style) -> tuple:
+    """Canonical (int, int, float, str) key for the drawing caches, so 2000, 2000.0 and 2030 share an entry"""
+    return int(bedrooms), int(bathrooms), float(AREA_STEP * math.floor(float(area) / AREA_STEP + 0.5)), str(style)
+
+
+@st.cache_data(show_spinner=False)
+def render_interior_design_png(_planner: CivilHomePlanner, bedrooms: int, bathrooms: int, area: float, style: str,
+                               dpi: int = PNG_DPI) -> bytes:
+    """Four-room interior design as PNG bytes, cached on the drawing inputs"""
+    return _planner.interior_design_png(bedrooms, bathrooms, area, style, dpi)
+
+
+def submit_interior_design_png(planner: CivilHomePlanner, bedrooms: int, bathrooms: int, area: float, style: str,
+                               dpi: int = PNG_DPI) -> Future:
+    """Encode render_interior_design_png on the PNG pool under the calling script's run context"""
+    ctx = get_script_run_ctx()
+    
+    def encode() -> bytes:
+        add_script_run_ctx(threading.current_thread(), ctx)
+        return render_interior_design_png(planner, bedrooms, bathrooms, area, style, dpi)
+    
+    return _PNG_POOL.submit(encode)
+
+
+@st.cache_data(show_spinner=False)
+def render_interior_design_json(_planner: CivilHomePlanner, bedrooms: int, bathrooms: int, area: float,
+                                style: str) -> str:
+    """Four-room interior design as Plotly JSON for the browser to draw, cached on the drawing inputs"""
+    return _planner.draw_interior_design_complete(bedrooms, bathrooms, area, style).to_json()
+
+
+@st.cache_data(show_spinner=False)
+def render_3d_house_json(_planner: CivilHomePlanner, bedrooms: int, style: str) -> str:
+    """3D house view as serialized Plotly JSON, cached on the drawing inputs"""
+    return _planner.draw_3d_house_view(bedrooms, style).to_json()
+
+
+def write_live_stream(stream: Iterator[str]) -> Optional[str]:
+    """Show tokens as they arrive, then clear them so the tab's result block renders the final text"""
+    live = st.empty()
+    with live.container():
+        text = st.write_stream(stream)
+    if text:
+        live.empty()
+    return text or None
 
 
 def main():
@@ -920,9 +1524,6 @@ def main():
     st.title("🏠 Civil Home Planner with Ollama")
     st.markdown("AI-powered assistance for residential home planning, design, and construction!")
     
-    # Initialize planner
-    planner = CivilHomePlanner()
-    
     # Sidebar - Connection and Configuration
     with st.sidebar:
         st.header("🔧 Configuration")
@@ -934,29 +1535,39 @@ def main():
             help="Enter Ollama server URL"
         )
         
-        if ollama_host != planner.base_url:
-            planner = CivilHomePlanner(ollama_host)
-        
-        # Connection status
-        if planner.check_connection():
+        # Connection status (the model is warmed once one is selected)
+        if _ping(ollama_host):
             st.success("✅ Ollama Connected!")
             
-            models = planner.get_available_models()
+            models = list(_list_models(ollama_host))
             if models:
-                selected_model = st.selectbox("Select Model:", models)
-                planner.model = selected_model
+                selected_model = st.selectbox(
+                    "Select Model:", models,
+                    index=models.index(DEFAULT_MODEL) if DEFAULT_MODEL in models else 0
+                )
+                # Pin the shared planner to this session until the host or model changes
+                if st.session_state.get('planner_key') != (ollama_host, selected_model):
+                    st.session_state['planner'] = get_planner(ollama_host, selected_model)
+                    st.session_state['planner_key'] = (ollama_host, selected_model)
+                    st.session_state['planner'].warm_up()
+                planner = st.session_state['planner']
                 st.info(f"📌 Using: {selected_model}")
             else:
                 st.error("❌ No models available")
+                _list_models.clear()  # Pick up newly pulled models on the next rerun
                 return
         else:
             st.error("❌ Cannot connect to Ollama")
-            st.info("Start Ollama: `ollama serve`")
+            _ping.clear()  # Only a reachable host is remembered
+            st.info("Start Ollama: `OLLAMA_NUM_PARALLEL=4 ollama serve`")
             return
         
         st.divider()
         st.markdown("**📋 Navigation**")
     
+    # Filled with the floor plan download once its background encode is done
+    png_slot = None
+    
     # Main tabs
     tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs([
         "🎨 Design Suggestions",
@@ -995,23 +1606,58 @@ def main():
             placeholder="e.g., Open concept kitchen, Home office, Swimming pool..."
         )
         
+        specifications = {
+            "building_type": building_type,
+            "total_area": total_area,
+            "num_floors": num_floors,
+            "bedrooms": bedrooms,
+            "budget": budget,
+            "climate": climate,
+            "special_req": special_req
+        }
+        
         if st.button("🚀 Get Design Suggestions", type="primary", use_container_width=True):
             with st.spinner("Analyzing your requirements..."):
-                specifications = {
-                    "building_type": building_type,
-                    "total_area": total_area,
-                    "num_floors": num_floors,
-                    "bedrooms": bedrooms,
-                    "budget": budget,
-                    "climate": climate,
-                    "special_req": special_req
-                }
-                
-                suggestions = planner.get_design_suggestions(specifications)
+                suggestions = write_live_stream(planner.stream_design_suggestions(specifications))
                 
                 if suggestions:
                     st.session_state['design_suggestions'] = suggestions
         
+        if st.button("📦 Generate Full Plan", use_container_width=True,
+                     help="Design, materials, budget and compliance from a single generation"):
+            with st.spinner("Generating the full plan..."):
+                report = write_live_stream(planner.stream_full_report(specifications))
+                
+                if report:
+                    report = _split_report(report)
+                    for key, state_key in [("design", "design_suggestions"), ("materials", "material_recs"),
+                                           ("budget", "budget_est"), ("compliance", "compliance_guide")]:
+                        if report[key]:
+                            st.session_state[state_key] = report[key]
+                    
+                    if not all(report.values()):
+                        st.warning("Some sections were missing from the report. Try again or use the individual tabs.")
+        
+        if st.button("⚡ Fill Every Tab", use_container_width=True,
+                     help="Run the design, materials, budget, compliance and SketchUp prompts concurrently "
+                          "with each tab's current inputs"):
+            with st.spinner("Generating all five sections..."):
+                # Widget values from the other tabs are already in session state on a rerun
+                results = planner.run_all(
+                    specifications,
+                    (st.session_state['material_climate'], st.session_state['material_budget']),
+                    (st.session_state['budget_area'], st.session_state['quality_level'],
+                     st.session_state['location_type']),
+                    (st.session_state['construction_type'], st.session_state['compliance_location']),
+                    (st.session_state['sketch_style'], f"{st.session_state['sketch_bedrooms']} bedrooms",
+                     st.session_state['sketch_materials'])
+                )
+                for key, state_key in [("design", "design_suggestions"), ("materials", "material_recs"),
+                                       ("budget", "budget_est"), ("compliance", "compliance_guide"),
+                                       ("visualization", "3d_guide")]:
+                    if results[key]:
+                        st.session_state[state_key] = results[key]
+        
         if 'design_suggestions' in st.session_state:
             st.success("✅ Design Suggestions Generated!")
             st.markdown("---")
@@ -1050,10 +1696,10 @@ def main():
         
         if st.button("🔍 Get Material Recommendations", type="primary", use_container_width=True):
             with st.spinner("Researching materials..."):
-                recommendations = planner.get_material_recommendations(
+                recommendations = write_live_stream(planner.stream_material_recommendations(
                     material_climate,
                     material_budget
-                )
+                ))
                 
                 if recommendations:
                     st.session_state['material_recs'] = recommendations
@@ -1103,15 +1749,35 @@ def main():
         
         if st.button("🧮 Calculate Budget", type="primary", use_container_width=True):
             with st.spinner("Calculating costs..."):
-                estimation = planner.get_budget_estimation(
+                estimation = write_live_stream(planner.stream_budget_estimation(
                     budget_area,
                     quality_level,
                     location_type
-                )
+                ))
                 
                 if estimation:
                     st.session_state['budget_est'] = estimation
         
+        if st.button("📊 Itemized Cost Table", use_container_width=True):
+            with st.spinner("Building cost table..."):
+                breakdown = planner.get_budget_breakdown(budget_area, quality_level, location_type)
+                if breakdown:
+                    st.session_state['budget_table'] = breakdown
+        
+        if 'budget_table' in st.session_state:
+            breakdown = st.session_state['budget_table']
+            col1, col2 = st.columns(2)
+            col1.metric("Cost per sq ft", str(breakdown.get('cost_per_sqft', 'N/A')))
+            col2.metric("Total Estimate", str(breakdown.get('total', 'N/A')))
+            
+            rows = list(breakdown['breakdown'])
+            rows += [{"category": name.title(), "cost": breakdown[name]}
+                     for name in ("labor", "materials", "contingency") if breakdown.get(name)]
+            if rows:
+                st.table(rows)
+            for tip in breakdown['tips']:
+                st.markdown(f"- {tip}")
+        
         if 'budget_est' in st.session_state:
             st.success("✅ Budget Estimation Generated!")
             st.markdown("---")
@@ -1148,10 +1814,10 @@ def main():
         
         if st.button("📚 Get Compliance Guide", type="primary", use_container_width=True):
             with st.spinner("Researching compliance requirements..."):
-                compliance = planner.get_compliance_guide(
+                compliance = write_live_stream(planner.stream_compliance_guide(
                     construction_type,
                     compliance_location
-                )
+                ))
                 
                 if compliance:
                     st.session_state['compliance_guide'] = compliance
@@ -1186,6 +1852,7 @@ def main():
                 min_value=500,
                 max_value=50000,
                 value=2000,
+                step=AREA_STEP,
                 key="fp_area"
             )
             fp_style = st.selectbox(
@@ -1195,14 +1862,18 @@ def main():
             )
         
         if st.button("🎨 Draw Floor Plan", type="primary", use_container_width=True):
-            with st.spinner("Creating COMPLETE INTERIOR DESIGN..."):
-                fig = planner.draw_interior_design_complete(fp_bedrooms, fp_bathrooms, fp_area, fp_style)
-                st.session_state['floor_plan_fig'] = fig
-        
-        if 'floor_plan_fig' in st.session_state:
+            plan_spec = plan_geometry(fp_bedrooms, fp_bathrooms, fp_area, fp_style)
+            # Unchanged inputs keep the figure already on screen
+            if st.session_state.get('floor_plan_spec') != plan_spec:
+                with st.spinner("Creating COMPLETE INTERIOR DESIGN..."):
+                    st.session_state['floor_plan_fig'] = json.loads(render_interior_design_json(planner, *plan_spec))
+                    st.session_state['floor_plan_spec'] = plan_spec
+        
+        if 'floor_plan_spec' in st.session_state:
+            plan_spec = st.session_state['floor_plan_spec']
             st.success("✅ COMPLETE INTERIOR DESIGN CREATED!")
             st.markdown("---")
-            st.pyplot(st.session_state['floor_plan_fig'], use_container_width=True)
+            st.plotly_chart(st.session_state['floor_plan_fig'], use_container_width=True)
             
             st.markdown("""
             ### 📋 COMPLETE HOME INTERIOR DESIGN INCLUDES:
@@ -1240,17 +1911,15 @@ def main():
             """)
             
             # Download floor plan image
-            buf = io.BytesIO()
-            st.session_state['floor_plan_fig'].savefig(buf, format='png', dpi=300, bbox_inches='tight')
-            buf.seek(0)
-            
-            st.download_button(
-                "💾 Download COMPLETE INTERIOR DESIGN (HIGH QUALITY PNG)",
-                buf,
-                file_name=f"complete_interior_design_{fp_style}.png",
-                mime="image/png",
-                use_container_width=True
-            )
+            hires = st.checkbox(f"High-res ({PNG_HIRES_DPI} dpi)", key="fp_hires",
+                                help=f"Slower to prepare; the standard download is {PNG_DPI} dpi")
+            png_spec = (plan_spec, PNG_HIRES_DPI if hires else PNG_DPI)
+            if st.session_state.get('floor_plan_png', (None,))[0] != png_spec:
+                st.session_state['floor_plan_png'] = (png_spec, submit_interior_design_png(
+                    planner, *plan_spec, dpi=png_spec[1]))
+            png_slot = st.empty()
+            if not st.session_state['floor_plan_png'][1].done():
+                png_slot.info("⏳ Preparing download...")
     
     # Tab 6: SketchUp & 3D Visualization Guide
     with tab6:
@@ -1276,18 +1945,74 @@ def main():
                 key="sketch_view"
             )
         
-        if st.button("🏘️ Generate 3D View", type="primary", use_container_width=True):
-            with st.spinner("Rendering 3D model..."):
-                fig_3d = planner.draw_3d_house_view(sketch_bedrooms, sketch_style)
-                st.session_state['3d_fig'] = fig_3d
+        sketch_materials = st.text_input(
+            "Primary Materials",
+            value="Brick, concrete, glass",
+            key="sketch_materials"
+        )
+        
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            if st.button("🏘️ Generate 3D View", type="primary", use_container_width=True):
+                house_spec = (int(sketch_bedrooms), str(sketch_style))
+                if st.session_state.get('3d_spec') != house_spec:
+                    with st.spinner("Rendering 3D model..."):
+                        st.session_state['3d_fig'] = json.loads(render_3d_house_json(planner, *house_spec))
+                        st.session_state['3d_spec'] = house_spec
+        
+        with col2:
+            guide_clicked = st.button("🧭 Generate SketchUp Guide", use_container_width=True)
+        
+        if guide_clicked:
+            with st.spinner("Writing the SketchUp guide..."):
+                guide = write_live_stream(planner.stream_3d_visualization_guide(
+                    sketch_style,
+                    f"{sketch_bedrooms} bedrooms",
+                    sketch_materials
+                ))
+                
+                if guide:
+                    st.session_state['3d_guide'] = guide
         
-        if '3d_fig' in st.session_state:
+        if '3d_spec' in st.session_state:
             st.success("✅ 3D Visualization Created!")
             st.plotly_chart(st.session_state['3d_fig'], use_container_width=True)
             
             st.info("💡 Rotate, zoom, and interact with the 3D model above!")
+        
+        if '3d_guide' in st.session_state:
+            st.markdown("---")
+            st.subheader("🧭 SketchUp Modeling Guide")
+            st.markdown(st.session_state['3d_guide'])
+            
+            st.download_button(
+                "💾 Download SketchUp Guide",
+                st.session_state['3d_guide'],
+                file_name="sketchup_guide.txt",
+                mime="text/plain",
+                use_container_width=True
+            )
     
     
+    if png_slot is not None:
+        (plan_spec, _), png = st.session_state['floor_plan_png']
+        # The page is already on screen; wait in short slices so a widget change can interrupt this run
+        while not wait([png], timeout=0.25).done:
+            png_slot.info("⏳ Preparing download...")
+        if png.exception() is not None:
+            # Forget the failed encode so the next rerun tries again instead of re-raising
+            del st.session_state['floor_plan_png']
+            png_slot.error(f"Could not prepare the PNG download: {png.exception()}")
+        else:
+            png_slot.download_button(
+                "💾 Download COMPLETE INTERIOR DESIGN (PNG)",
+                png.result(),
+                file_name=f"complete_interior_design_{plan_spec[3]}.png",
+                mime="image/png",
+                use_container_width=True
+            )
+    
     # Footer
     st.markdown("---")
     st.markdown("""